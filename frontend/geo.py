@@ -0,0 +1,157 @@
+"""Viewport helpers for the map API: bounding boxes, MongoDB geo filters and zoom-dependent precision"""
+
+import math
+
+# Mercator maps stop short of the poles; polygons touching them are degenerate
+MAX_LATITUDE = 89.9
+MAX_MERCATOR_LATITUDE = 85.05112878
+# Top and bottom edges are parallels, not great circles: they are sampled at this step (degrees)
+EDGE_STEP = 1.0
+# Big polygons (more than a hemisphere) need an explicit winding order
+STRICT_WINDING_CRS = {'type': 'name', 'properties': {'name': 'urn:x-mongodb:crs:strictwinding:EPSG:4326'}}
+
+
+def parse_bbox(value):
+    """
+    Parse a viewport bounding box
+
+    Args:
+        value (str): "west,south,east,north" in degrees; west may be greater than east across the antimeridian
+
+    Returns:
+        tuple: (west, south, east, north) with east - west in (0, 360], or None for the whole world
+
+    Raises:
+        ValueError: If the value is malformed
+    """
+    parts = [float(p) for p in value.split(',')]
+    if len(parts) != 4 or not all(math.isfinite(p) for p in parts):
+        raise ValueError("bbox must be west,south,east,north")
+    west, south, east, north = parts
+    if south > north:
+        raise ValueError("bbox south must not exceed north")
+    width = east - west if east > west else east - west + 360
+    if width >= 360:
+        return None
+    # Map libraries report longitudes of wrapped world copies beyond +-180
+    west = (west + 180) % 360 - 180
+    south = max(south, -MAX_LATITUDE)
+    north = min(north, MAX_LATITUDE)
+    return west, south, west + width, north
+
+
+def _ring(west, south, east, north):
+    """Counterclockwise ring with the parallels sampled every EDGE_STEP degrees."""
+    steps = max(1, math.ceil((east - west) / EDGE_STEP))
+    lngs = [west + (east - west) * i / steps for i in range(steps + 1)]
+    # Longitudes beyond 180 are written as their wrapped equivalent
+    lngs = [lng - 360 if lng > 180 else lng for lng in lngs]
+    bottom = [[lng, south] for lng in lngs]
+    top = [[lng, north] for lng in reversed(lngs)]
+    return bottom + top + [bottom[0]]
+
+
+def bbox_filter(bbox, field='geometry'):
+    """
+    MongoDB filter for points inside a bounding box, answered by the 2dsphere index
+
+    Args:
+        bbox: Result of parse_bbox
+        field (str): GeoJSON point field
+
+    Returns:
+        dict: Filter, empty for the whole world
+    """
+    if bbox is None:
+        return {}
+    polygon = {'type': 'Polygon', 'coordinates': [_ring(*bbox)], 'crs': STRICT_WINDING_CRS}
+    return {field: {'$geoWithin': {'$geometry': polygon}}}
+
+
+def coordinate_decimals(zoom):
+    """
+    Decimals needed to place a point to a fraction of a pixel at a zoom level
+
+    Args:
+        zoom (float): Map zoom, or None for full precision
+
+    Returns:
+        int: Number of decimals between 1 and 6
+    """
+    if zoom is None:
+        return 6
+    pixels_per_degree = 256 * 2 ** zoom / 360
+    return min(6, max(1, math.ceil(math.log10(pixels_per_degree)) + 1))
+
+
+def tile_xy(latitude, longitude, zoom):
+    """
+    Web Mercator tile containing a point (the same grid as src/utils/clusters.py)
+
+    Args:
+        latitude (float): Latitude in degrees
+        longitude (float): Longitude in degrees
+        zoom (int): Tile zoom
+
+    Returns:
+        tuple: (x, y) tile coordinates
+    """
+    n = 2 ** zoom
+    latitude = max(-MAX_MERCATOR_LATITUDE, min(MAX_MERCATOR_LATITUDE, latitude))
+    x = int((longitude + 180) / 360 * n)
+    phi = math.radians(latitude)
+    y = int((1 - math.log(math.tan(phi) + 1 / math.cos(phi)) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_ranges(bbox, zoom):
+    """
+    Tiles covering a bounding box
+
+    Args:
+        bbox: Result of parse_bbox
+        zoom (int): Tile zoom
+
+    Returns:
+        list: (x_min, x_max, y_min, y_max) ranges, two of them across the antimeridian
+    """
+    n = 2 ** zoom
+    if bbox is None:
+        return [(0, n - 1, 0, n - 1)]
+    west, south, east, north = bbox
+    x_min, y_min = tile_xy(north, west, zoom)
+    if east <= 180:
+        x_max, y_max = tile_xy(south, east, zoom)
+        return [(x_min, x_max, y_min, y_max)]
+    x_max, y_max = tile_xy(south, east - 360, zoom)
+    return [(x_min, n - 1, y_min, y_max), (0, x_max, y_min, y_max)]
+
+
+def tile_bounds(zoom, x, y):
+    """
+    Bounding box of a Web Mercator tile
+
+    Returns:
+        tuple: (west, south, east, north) in degrees
+    """
+    n = 2 ** zoom
+
+    def latitude(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360 - 180, latitude(y + 1), (x + 1) / n * 360 - 180, latitude(y)
+
+
+def tile_pixel(latitude, longitude, zoom, x, y, extent=256):
+    """
+    Position of a point inside a tile
+
+    Returns:
+        tuple: (column, row) in [0, extent) for points inside the tile
+    """
+    n = 2 ** zoom
+    latitude = max(-MAX_MERCATOR_LATITUDE, min(MAX_MERCATOR_LATITUDE, latitude))
+    phi = math.radians(latitude)
+    column = ((longitude + 180) / 360 * n - x) * extent
+    row = ((1 - math.log(math.tan(phi) + 1 / math.cos(phi)) / math.pi) / 2 * n - y) * extent
+    return min(max(int(column), 0), extent - 1), min(max(int(row), 0), extent - 1)
@@ -1,6 +1,13 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, GEOSPHERE, TEXT, ASCENDING
 from datetime import datetime
 import random
+import os
+
+from geo import tile_xy
+
+# Same cell scheme as src/utils/clusters.py: level z cells are the tiles of zoom z + CELL_BITS
+CELL_BITS = 3
+CLUSTER_MAX_ZOOM = int(os.getenv('CLUSTER_MAX_ZOOM', 16))
 
 # Connect to MongoDB
 client = MongoClient('mongodb://localhost:27017/')
@@ -88,11 +95,34 @@ for i in range(100):
         "longitude": location["lon"] + lon_offset,
         "category": category
     }
+    # GeoJSON point for the map's viewport queries
+    event["geometry"] = {"type": "Point", "coordinates": [event["longitude"], event["latitude"]]}
     
     sample_data.append(event)
 
 # Insert sample data into MongoDB
 collection.insert_many(sample_data)
 
+# Indexes the map's viewport queries and search rely on (the parser provisions the same ones)
+collection.create_index([("geometry", GEOSPHERE)], name="geometry_2dsphere")
+collection.create_index([("title", TEXT), ("content", TEXT)], name="text_search", default_language="russian",
+                        weights={"title": 3, "content": 1})
+
+# Map clusters, which the parser keeps up to date on every upsert; the map shows them below zoom 11
+clusters = db[os.getenv('CLUSTERS_COLLECTION', 'event_clusters')]
+clusters.delete_many({})
+cells = {}
+for event in sample_data:
+    for level in range(CLUSTER_MAX_ZOOM + 1):
+        x, y = tile_xy(event["latitude"], event["longitude"], level + CELL_BITS)
+        cell = cells.setdefault(f"{level}/{x}/{y}", {"_id": f"{level}/{x}/{y}", "level": level, "x": x, "y": y,
+                                                     "count": 0, "lat_sum": 0.0, "lng_sum": 0.0, "categories": {}})
+        cell["count"] += 1
+        cell["lat_sum"] += event["latitude"]
+        cell["lng_sum"] += event["longitude"]
+        cell["categories"][event["category"]] = cell["categories"].get(event["category"], 0) + 1
+clusters.insert_many(list(cells.values()))
+clusters.create_index([("level", ASCENDING), ("x", ASCENDING), ("y", ASCENDING)], name="level_cell")
+
 print(f"Successfully created {len(sample_data)} sample events in the database.")
 print(f"Categories used: {categories}")
\ No newline at end of file
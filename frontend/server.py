@@ -1,13 +1,39 @@
 from flask import Flask, render_template, jsonify, request
-from pymongo import MongoClient
+from pymongo import MongoClient, DESCENDING
+from pymongo.errors import OperationFailure
 import json
 import os
-from bson import json_util
+import hashlib
+from datetime import datetime, timedelta
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from geo import parse_bbox, bbox_filter, coordinate_decimals, tile_ranges, tile_bounds, tile_pixel
+from tile_cache import TileCache
 
 # Get environment variables
 MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
 MONGO_DB = os.getenv('MONGO_DB', 'news_classification')
 MONGO_COLLECTION = os.getenv('MONGO_COLLECTION', 'events')
+EVENTS_DEFAULT_LIMIT = int(os.getenv('EVENTS_DEFAULT_LIMIT', 500))
+EVENTS_MAX_LIMIT = int(os.getenv('EVENTS_MAX_LIMIT', 2000))
+# Search results are ranked; paging stops after this many
+SEARCH_MAX_RESULTS = int(os.getenv('SEARCH_MAX_RESULTS', 1000))
+# Precomputed by the parser on every upsert (src/utils/clusters.py); the settings must match its own
+CLUSTERS_COLLECTION = os.getenv('CLUSTERS_COLLECTION', 'event_clusters')
+CLUSTER_MAX_ZOOM = int(os.getenv('CLUSTER_MAX_ZOOM', 16))
+CLUSTERS_MAX_CELLS = int(os.getenv('CLUSTERS_MAX_CELLS', 5000))
+# Cluster cells of level z are the map tiles of zoom z + CELL_BITS (32 px cells)
+CELL_BITS = 3
+# Tiles: versions are bumped by the parser down to TILE_VERSION_MAX_ZOOM, deeper tiles follow their ancestor
+TILE_VERSIONS_COLLECTION = os.getenv('TILE_VERSIONS_COLLECTION', 'tile_versions')
+TILE_VERSION_MAX_ZOOM = int(os.getenv('TILE_VERSION_MAX_ZOOM', 16))
+TILE_MAX_ZOOM = int(os.getenv('TILE_MAX_ZOOM', 20))
+TILE_MAX_FEATURES = int(os.getenv('TILE_MAX_FEATURES', 5000))
+TILE_CACHE_DIR = os.getenv('TILE_CACHE_DIR', '') or None
+TILE_CACHE_MEMORY_ITEMS = int(os.getenv('TILE_CACHE_MEMORY_ITEMS', 2000))
+# Points are merged per cell of a TILE_EXTENT x TILE_EXTENT grid over the tile (one cell per pixel)
+TILE_EXTENT = 256
 
 app = Flask(__name__, 
             template_folder='frontend')  # Point to the frontend directory
@@ -16,6 +42,9 @@ app = Flask(__name__,
 client = MongoClient(MONGO_URI)
 db = client[MONGO_DB]
 collection = db[MONGO_COLLECTION]
+clusters = db[CLUSTERS_COLLECTION]
+tile_versions = db[TILE_VERSIONS_COLLECTION]
+tile_cache = TileCache(TILE_CACHE_DIR, TILE_CACHE_MEMORY_ITEMS)
 
 @app.route('/')
 def index():
@@ -23,27 +52,220 @@ def index():
     categories = collection.distinct('category')
     return render_template('index.html', categories=categories)
 
+# Fields the map needs for markers and popups; the article body is fetched per event
+MARKER_FIELDS = {'title': 1, 'category': 1, 'location': 1, 'date': 1, 'latitude': 1, 'longitude': 1}
+
+def bad_request(message):
+    return jsonify({'error': message}), 400
+
+def parse_day_bound(value, end=False):
+    """
+    Turn a from/to parameter into a filter on the ISO 'date' strings
+
+    Args:
+        value (str): ISO date or datetime
+        end (bool): Whether this is the end of the range; a bare date then includes the whole day
+
+    Returns:
+        dict: Comparison for the 'date' field
+    """
+    moment = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        return {'$lt': (moment + timedelta(days=1)).isoformat()}
+    return {'$lte' if end else '$gte': moment.isoformat()}
+
 @app.route('/api/events')
 def get_events():
+    """
+    Markers for a viewport, newest first, or by relevance when searching
+
+    Query parameters: bbox (west,south,east,north), zoom, from, to, category, search,
+    cursor (next_cursor of the previous page) and limit.
+
+    Search goes through the Russian text index of title and content, so word forms match
+    ("пожар" finds "пожара"); quoted phrases and -excluded words follow MongoDB's $text syntax.
+    """
     # Get filter parameters
     category = request.args.get('category')
-    search_text = request.args.get('search')
+    search_text = (request.args.get('search') or '').strip()
     
     # Build query
     query = {}
+    offset = 0
+    try:
+        bbox = parse_bbox(request.args['bbox']) if request.args.get('bbox') else None
+        zoom = float(request.args['zoom']) if request.args.get('zoom') else None
+        limit = min(max(int(request.args.get('limit', EVENTS_DEFAULT_LIMIT)), 1), EVENTS_MAX_LIMIT)
+        date_range = {}
+        if request.args.get('from'):
+            date_range.update(parse_day_bound(request.args['from']))
+        if request.args.get('to'):
+            date_range.update(parse_day_bound(request.args['to'], end=True))
+        # Ranked search results are paged by position, the newest-first listing by _id
+        if request.args.get('cursor') and search_text:
+            offset = int(request.args['cursor'])
+            if offset < 0:
+                raise ValueError("cursor must not be negative")
+        elif request.args.get('cursor'):
+            query['_id'] = {'$lt': ObjectId(request.args['cursor'])}
+    except (ValueError, InvalidId) as e:
+        return bad_request(str(e))
+    query.update(bbox_filter(bbox))
+    if date_range:
+        query['date'] = date_range
     if category and category != 'all':
         query['category'] = category
+    
+    # Execute query; one extra document tells whether there is a next page
     if search_text:
-        query['$or'] = [
-            {'title': {'$regex': search_text, '$options': 'i'}},
-            {'content': {'$regex': search_text, '$options': 'i'}}
-        ]
+        query['$text'] = {'$search': search_text, '$language': 'russian'}
+        score = {'score': {'$meta': 'textScore'}}
+        limit = max(0, min(limit, SEARCH_MAX_RESULTS - offset))
+        cursor = collection.find(query, {**MARKER_FIELDS, **score}).sort([('score', {'$meta': 'textScore'}),
+                                                                          ('_id', DESCENDING)])
+        cursor = cursor.skip(offset).limit(limit + 1)
+    else:
+        cursor = collection.find(query, MARKER_FIELDS).sort('_id', DESCENDING).limit(limit + 1)
+    try:
+        documents = list(cursor)
+    except OperationFailure as e:
+        # $text needs the text_search index provisioned by the parser
+        return jsonify({'error': f"search is unavailable: {e}"}), 503
+    has_more = limit > 0 and len(documents) > limit
+    documents = documents[:limit]
+    
+    decimals = coordinate_decimals(zoom)
+    events = []
+    for doc in documents:
+        event = {'id': str(doc.pop('_id')), **doc}
+        for field in ('latitude', 'longitude'):
+            if isinstance(event.get(field), (int, float)):
+                event[field] = round(event[field], decimals)
+        events.append(event)
+    if not has_more or (search_text and offset + limit >= SEARCH_MAX_RESULTS):
+        next_cursor = None
+    elif search_text:
+        next_cursor = str(offset + limit)
+    else:
+        next_cursor = events[-1]['id']
+    return jsonify({'events': events, 'next_cursor': next_cursor})
+
+@app.route('/api/events/<event_id>')
+def get_event(event_id):
+    """Full event, including its content, for the details view."""
+    try:
+        doc = collection.find_one({'_id': ObjectId(event_id)}, {'geometry': 0})
+    except InvalidId:
+        return bad_request("invalid event id")
+    if doc is None:
+        return jsonify({'error': "event not found"}), 404
+    doc['id'] = str(doc.pop('_id'))
+    return jsonify(doc)
+
+@app.route('/api/clusters')
+def get_clusters():
+    """
+    Event clusters of a viewport: one per grid cell of about 32 px at the given zoom
+
+    Query parameters: bbox (west,south,east,north), zoom and category.
+    """
+    try:
+        bbox = parse_bbox(request.args['bbox']) if request.args.get('bbox') else None
+        zoom = float(request.args.get('zoom', 0))
+    except ValueError as e:
+        return bad_request(str(e))
+    level = min(max(int(zoom), 0), CLUSTER_MAX_ZOOM)
+    
+    query = {'level': level, 'count': {'$gt': 0}}
+    query['$or'] = [{'x': {'$gte': x_min, '$lte': x_max}, 'y': {'$gte': y_min, '$lte': y_max}}
+                    for x_min, x_max, y_min, y_max in tile_ranges(bbox, level + CELL_BITS)]
+    category = request.args.get('category')
+    # Category names are stored as keys, with dots replaced
+    category_key = category.replace('.', '_').lstrip('$') if category and category != 'all' else None
+    if category_key:
+        query[f'categories.{category_key}'] = {'$gt': 0}
     
-    # Execute query
-    events = list(collection.find(query))
+    decimals = coordinate_decimals(zoom)
+    cells = []
+    for doc in clusters.find(query).limit(CLUSTERS_MAX_CELLS):
+        categories = {name: n for name, n in doc.get('categories', {}).items() if n > 0}
+        cells.append({
+            'id': doc['_id'],
+            'count': categories[category_key] if category_key else doc['count'],
+            'latitude': round(doc['lat_sum'] / doc['count'], decimals),
+            'longitude': round(doc['lng_sum'] / doc['count'], decimals),
+            'categories': categories,
+        })
+    return jsonify({'level': level, 'clusters': cells})
+
+def tile_version(z, x, y):
+    """Current version of a tile; tiles below TILE_VERSION_MAX_ZOOM change with their ancestor."""
+    shift = max(0, z - TILE_VERSION_MAX_ZOOM)
+    doc = tile_versions.find_one({'_id': f"{z - shift}/{x >> shift}/{y >> shift}"})
+    return doc['version'] if doc else 0
+
+def render_tile(z, x, y, category):
+    """
+    Events of a tile as compact GeoJSON, with points in the same pixel merged into one feature
+
+    Returns:
+        str: FeatureCollection; merged features carry the number of events in 'count'
+    """
+    west, south, east, north = bounds = tile_bounds(z, x, y)
+    # The single tile of zoom 0 is the whole world, which is no polygon
+    query = bbox_filter(bounds) if z > 0 else {'geometry': {'$exists': True}}
+    if category != 'all':
+        query['category'] = category
+    fields = {'title': 1, 'category': 1, 'date': 1, 'location': 1, 'geometry': 1}
+    
+    decimals = coordinate_decimals(z)
+    features = {}
+    for doc in collection.find(query, fields).sort('_id', DESCENDING).limit(TILE_MAX_FEATURES):
+        longitude, latitude = doc['geometry']['coordinates']
+        # Points on the shared edge of two tiles belong to the one they would be drawn in
+        if not (west <= longitude < east and south < latitude <= north):
+            continue
+        pixel = tile_pixel(latitude, longitude, z, x, y, TILE_EXTENT)
+        if pixel in features:
+            features[pixel]['properties']['count'] += 1
+            continue
+        features[pixel] = {
+            'type': 'Feature',
+            'geometry': {'type': 'Point',
+                         'coordinates': [round(longitude, decimals), round(latitude, decimals)]},
+            'properties': {'id': str(doc['_id']), 'title': doc.get('title'), 'category': doc.get('category'),
+                           'date': doc.get('date'), 'location': doc.get('location'), 'count': 1},
+        }
+    return json.dumps({'type': 'FeatureCollection', 'features': list(features.values())},
+                      ensure_ascii=False, separators=(',', ':'), default=str)
+
+@app.route('/tiles/<int:z>/<int:x>/<int:y>')
+def get_tile(z, x, y):
+    """
+    Events of one map tile as GeoJSON, optionally for one category
+
+    Tiles are cached per version, and the version doubles as an ETag, so clients revalidate
+    cached tiles with a cheap conditional request.
+    """
+    if not (0 <= z <= TILE_MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({'error': "tile out of range"}), 404
+    category = request.args.get('category') or 'all'
     
-    # Convert MongoDB BSON to JSON
-    return json_util.dumps(events)
+    # The version is read before rendering: a tile rendered later can only be newer than its version
+    version = tile_version(z, x, y)
+    etag = f"{z}-{x}-{y}-{version}-{hashlib.sha1(category.encode('utf-8')).hexdigest()[:8]}"
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        key = (z, x, y, category)
+        body = tile_cache.get(key, version)
+        if body is None:
+            body = render_tile(z, x, y, category)
+            tile_cache.put(key, version, body)
+        response = app.response_class(body, mimetype='application/geo+json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/api/categories')
 def get_categories():
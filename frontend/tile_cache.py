@@ -0,0 +1,81 @@
+"""In-memory and on-disk cache of rendered map tiles, valid for one version of each tile"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class TileCache:
+    """
+    Rendered tiles keyed by tile and filter. Every entry remembers the tile version it was rendered
+    for; the parser bumps the versions of the tiles it writes to, so only those tiles are re-rendered.
+    """
+
+    def __init__(self, directory=None, memory_items=2000):
+        self.directory = directory
+        self.memory_items = memory_items
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha1(json.dumps(key, ensure_ascii=False).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.json")
+
+    def get(self, key, version):
+        """
+        Cached tile body
+
+        Args:
+            key (tuple): Tile coordinates and filter
+            version (int): Current version of the tile
+
+        Returns:
+            str: Body rendered for this version, or None
+        """
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None and entry[0] == version:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        if self.directory:
+            try:
+                with open(self._path(key), encoding='utf-8') as f:
+                    stored = json.load(f)
+            except (OSError, ValueError):
+                stored = None
+            if stored is not None and stored['version'] == version:
+                self._remember(key, version, stored['body'])
+                with self.lock:
+                    self.hits += 1
+                return stored['body']
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, version, body):
+        """Store a tile body rendered for a version."""
+        self._remember(key, version, body)
+        if not self.directory:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written to a temporary file first so concurrent readers never see half a tile
+        fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'version': version, 'body': body}, f, ensure_ascii=False)
+        os.replace(temporary, path)
+
+    def _remember(self, key, version, body):
+        with self.lock:
+            self.memory[key] = (version, body)
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_items:
+                self.memory.popitem(last=False)
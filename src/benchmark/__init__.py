@@ -0,0 +1 @@
+"""Offline end-to-end benchmark of the pipeline against local stand-ins for news sites, OpenAI and Yandex"""
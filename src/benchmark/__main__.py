@@ -0,0 +1,190 @@
+"""
+Run the whole pipeline against local stand-ins and report throughput, stage latencies and memory
+
+    python -m src.benchmark --sources 4 --articles 30 --llm-latency 0.3 --llm-429-rate 0.05
+
+Pipeline settings are read from the environment as usual, so strategies can be compared by running
+the benchmark twice, e.g. with LLM_BATCH_ENRICHMENT=0 and =1. Endpoints, caches and MongoDB are
+pointed at the stand-ins and a scratch directory unless set explicitly.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import threading
+import numpy as np
+
+from src.benchmark.stubs import Faults, StubServer, FixtureHandler, FakeOpenAIHandler, FakeYandexHandler
+from src.benchmark.fixtures import generate_fixtures
+
+PERCENTILES = (50, 90, 99)
+SAMPLE_SECONDS = 0.05
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sources', type=int, default=4, help="number of fixture sources")
+    parser.add_argument('--articles', type=int, default=30, help="articles per source (the parser stops at 30)")
+    parser.add_argument('--duplicate-share', type=float, default=0.2, help="share of cross-source duplicates")
+    parser.add_argument('--workers', type=int, default=4, help="scraping processes (MAX_WORKERS)")
+    parser.add_argument('--page-rps', type=float, default=50.0, help="politeness rate of the fixture host")
+    for name, latency in (('page', 0.02), ('llm', 0.3), ('geo', 0.05)):
+        parser.add_argument(f'--{name}-latency', type=float, default=latency, help="seconds per request")
+        parser.add_argument(f'--{name}-jitter', type=float, default=latency / 2, help="+/- seconds per request")
+        parser.add_argument(f'--{name}-429-rate', type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument('--pages', help="serve recorded pages from this directory instead of generating them; "
+                                        "needs --sources-file")
+    parser.add_argument('--sources-file', help="JSON list of source configurations for --pages")
+    parser.add_argument('--workdir', help="scratch directory (a temporary one by default)")
+    parser.add_argument('--mongo-uri', help="persist to this MongoDB instead of skipping the database")
+    parser.add_argument('--json', help="also write the report to this file")
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def current_rss_mb():
+    """Resident set size of this process."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class RssSampler:
+    """Samples memory in the background and keeps the peak seen while each pipeline stage was busy"""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.peaks = {}
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="rss-sampler", daemon=True)
+
+    def run(self):
+        while not self.stopped.wait(SAMPLE_SECONDS):
+            rss = current_rss_mb()
+            for stage in list(self.pipeline.active) + ['total']:
+                self.peaks[stage] = max(self.peaks.get(stage, 0.0), rss)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+
+def summarize(values):
+    if not values:
+        return {'count': 0}
+    summary = {'count': len(values)}
+    for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f'p{p}'] = round(float(value), 4)
+    summary['max'] = round(max(values), 4)
+    return summary
+
+
+def configure_environment(args, workdir, openai, yandex):
+    """Point the pipeline at the stand-ins; must run before anything from src.utils is imported."""
+    os.environ['OPENAI_API_KEY'] = os.environ.get('OPENAI_API_KEY') or 'benchmark'
+    os.environ['OPENAI_BASE_URL'] = f"{openai.url}/v1"
+    os.environ['YANDEX_API_KEY'] = os.environ.get('YANDEX_API_KEY') or 'benchmark'
+    os.environ['YANDEX_GEOCODER_URL'] = f"{yandex.url}/1.x/"
+    os.environ['MAX_WORKERS'] = str(args.workers)
+    os.environ['PIPELINE_OUTPUT_DIR'] = os.path.join(workdir, 'output')
+    if args.mongo_uri:
+        os.environ['MONGO_URI'] = args.mongo_uri
+    else:
+        os.environ['MONGO_ENABLED'] = '0'
+    # Cold caches by default so every run does the same work
+    defaults = {
+        'INCREMENTAL_CRAWL': '0',
+        'PAGE_CACHE_MODE': 'off',
+        'LLM_CACHE_ENABLED': '0',
+        'GEOCODE_CACHE_ENABLED': '0',
+        'LLM_CACHE_PATH': os.path.join(workdir, 'llm_cache.sqlite'),
+        'GEOCODE_CACHE_PATH': os.path.join(workdir, 'geocode_cache.sqlite'),
+    }
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = args.workdir or tempfile.mkdtemp(prefix='news-benchmark-')
+    site = args.pages or os.path.join(workdir, 'site')
+    os.makedirs(site, exist_ok=True)
+
+    page_faults = Faults(args.page_latency, args.page_jitter, args.page_429_rate, seed=args.seed)
+    llm_faults = Faults(args.llm_latency, args.llm_jitter, args.llm_429_rate, seed=args.seed + 1)
+    geo_faults = Faults(args.geo_latency, args.geo_jitter, args.geo_429_rate, seed=args.seed + 2)
+    fixture_server = StubServer(FixtureHandler, page_faults, directory=site).start()
+    openai = StubServer(FakeOpenAIHandler, llm_faults).start()
+    yandex = StubServer(FakeYandexHandler, geo_faults).start()
+
+    if args.pages:
+        if not args.sources_file:
+            sys.exit("--pages needs --sources-file with the source configurations of the recorded pages")
+        with open(args.sources_file, encoding='utf-8') as f:
+            sources = json.load(f)
+        for source in sources:
+            source['url'] = source['url'].replace('{base_url}', fixture_server.url)
+            if 'base_url' in source:
+                source['base_url'] = source['base_url'].replace('{base_url}', fixture_server.url)
+    else:
+        sources = generate_fixtures(site, fixture_server.url, args.sources, args.articles,
+                                    args.duplicate_share, args.seed, args.page_rps)
+    configure_environment(args, workdir, openai, yandex)
+
+    # Imported only now so that the settings above are picked up
+    from src.main import main as run_pipeline
+    from src.pipeline import StreamingPipeline
+
+    pipeline = StreamingPipeline()
+    started = time.perf_counter()
+    try:
+        with RssSampler(pipeline) as sampler:
+            run_pipeline(sources, pipeline)
+    finally:
+        for server in (fixture_server, openai, yandex):
+            server.stop()
+    elapsed = time.perf_counter() - started
+
+    peaks = {stage: round(mb, 1) for stage, mb in sampler.peaks.items()}
+    # Scraping runs in worker processes; their peak is reported by the kernel once they exit
+    peaks['scrape'] = round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+    report = {
+        'elapsed_seconds': round(elapsed, 2),
+        'articles_per_second': round(pipeline.stats['persisted'] / elapsed, 2) if elapsed else 0.0,
+        'stats': pipeline.stats,
+        'stage_seconds': {stage: summarize(values) for stage, values in pipeline.timings.items()},
+        'peak_rss_mb': peaks,
+        'stand_ins': {name: {'requests': faults.requests, 'rate_limited': faults.errors}
+                      for name, faults in (('pages', page_faults), ('openai', llm_faults), ('yandex', geo_faults))},
+        'workdir': workdir,
+    }
+
+    print("\n=== Benchmark report ===")
+    print(f"{report['stats']['persisted']} articles in {report['elapsed_seconds']}s: "
+          f"{report['articles_per_second']} articles/s")
+    for stage, summary in report['stage_seconds'].items():
+        print(f"  {stage:<8} " + ', '.join(f"{key}={value}" for key, value in summary.items()))
+    print("  peak RSS (MB): " + ', '.join(f"{stage}={mb}" for stage, mb in peaks.items()))
+    for name, counters in report['stand_ins'].items():
+        print(f"  {name}: {counters['requests']} requests, {counters['rate_limited']} answered with 429")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
+
+
+if __name__ == "__main__":
+    main()
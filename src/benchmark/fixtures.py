@@ -0,0 +1,115 @@
+"""Generated news-site fixtures: listing pages, article pages and the matching source configurations"""
+
+import os
+import html
+import random
+from datetime import datetime, timedelta
+
+PLACES = [("Москве", "Москва"), ("Химках", "Химки"), ("Подольске", "Подольск"), ("Балашихе", "Балашиха"),
+          ("Мытищах", "Мытищи"), ("Люберцах", "Люберцы"), ("Красногорске", "Красногорск")]
+STREETS = ["ул. Ленина", "Ленинском проспекте", "ул. Гагарина", "Варшавском шоссе", "ул. Мира", "пр-те Победы"]
+TITLES = [
+    "Пожар в квартире на {street} в {place}",
+    "ДТП с участием трех автомобилей произошло в {place}",
+    "На {km}-м км МКАД столкнулись грузовик и легковой автомобиль",
+    "Кража телефона в торговом центре в {place}",
+    "Драка у бара на {street} в {place}",
+    "Мужчина упал с крыши гаража в {place}",
+    "В {place} открыли новый сквер",
+    "Коммунальщики устраняют прорыв трубы на {street}",
+]
+SENTENCES = [
+    "Об этом сообщили в пресс-службе ведомства.",
+    "На место прибыли экстренные службы.",
+    "По предварительным данным, никто не пострадал.",
+    "Обстоятельства происшествия устанавливаются.",
+    "Очевидцы сняли происходящее на видео.",
+    "Движение в районе было затруднено около часа.",
+]
+
+ENTRIES_PER_PAGE = 10
+DATE_FORMAT = "%d.%m.%Y %H:%M"
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body>{body}</body></html>
+"""
+
+
+def _article(rng):
+    street = rng.choice(STREETS)
+    prepositional, place = rng.choice(PLACES)
+    title = rng.choice(TITLES).format(street=street, place=prepositional, km=rng.randint(1, 108))
+    sentences = [f"Инцидент произошел в {prepositional}."] + rng.sample(SENTENCES, 4)
+    return title, sentences
+
+
+def _write(path, title, body):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(PAGE.format(title=html.escape(title), body=body))
+
+
+def generate_fixtures(directory, base_url, sources=4, articles=30, duplicate_share=0.2, seed=0,
+                      requests_per_second=50.0, burst=20):
+    """
+    Write listing and article pages for several fixture sources
+
+    Args:
+        directory (str): Directory served by the fixture server
+        base_url (str): URL of the fixture server
+        sources (int): Number of sources
+        articles (int): Articles per source
+        duplicate_share (float): Share of articles that repeat a story of another source
+        seed (int): Random seed, the same seed gives the same pages
+        requests_per_second (float): Politeness rate configured for the fixture host
+        burst (int): Politeness burst configured for the fixture host
+
+    Returns:
+        list: Source configurations in the SOURCES_CONFIG format
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+    stories = []
+    configs = []
+    for s in range(sources):
+        prefix = f"source{s}"
+        entries = []
+        for a in range(articles):
+            if stories and rng.random() < duplicate_share:
+                title, sentences = rng.choice(stories)
+                # Reworded lead, same story
+                sentences = ["Как стало известно,"] + sentences
+            else:
+                title, sentences = _article(rng)
+                stories.append((title, sentences))
+            date = (now - timedelta(minutes=10 * a + s)).strftime(DATE_FORMAT)
+            path = f"{prefix}/articles/{a}.html"
+            body = (f'<h1 class="title">{html.escape(title)}</h1><time class="date">{date}</time>'
+                    f'<div class="body">{"".join(f"<p>{html.escape(p)}</p>" for p in sentences)}</div>')
+            _write(os.path.join(directory, path), title, body)
+            entries.append((f"/{path}", title))
+
+        pages = [entries[i:i + ENTRIES_PER_PAGE] for i in range(0, len(entries), ENTRIES_PER_PAGE)] or [[]]
+        for number, page_entries in enumerate(pages, start=1):
+            body = ''.join(f'<div class="entry"><a href="{href}">{html.escape(title)}</a></div>'
+                           for href, title in page_entries)
+            if number < len(pages):
+                body += f'<a class="next" href="/{prefix}/page{number + 1}.html">Далее</a>'
+            _write(os.path.join(directory, prefix, f"page{number}.html"), f"Source {s}", body)
+
+        configs.append({
+            'url': f"{base_url}/{prefix}/page1.html",
+            'source_name': f"fixture-{s}",
+            'entries_selector': 'div.entry',
+            'has_pagination': True,
+            'pagination_selector': 'a.next',
+            'title_selector': 'h1.title',
+            'date_selector': 'time.date',
+            'date_format': DATE_FORMAT,
+            'content_selector': 'div.body p',
+            'js_rendered': False,
+            'requests_per_second': requests_per_second,
+            'burst': burst,
+        })
+    return configs
@@ -0,0 +1,175 @@
+"""Local HTTP stand-ins: fixture news site, OpenAI chat completions and the Yandex geocoder"""
+
+import json
+import time
+import random
+import hashlib
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler, SimpleHTTPRequestHandler
+
+CATEGORIES = ["Другое", "Пожар", "ДТП", "Кража", "Нарушение_порядка", "Несчастный_случай"]
+LOCATIONS = ["ул. Ленина, Москва", "Химки", "МКАД, 32-й километр", "Подольск", "Тверская улица, Москва"]
+
+
+class Faults:
+    """Latency and error injection shared by all stand-ins"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, retry_after=0.5, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def apply(self):
+        """
+        Sleep for the configured latency and decide whether to fail the request
+
+        Returns:
+            bool: True if the request should be answered with 429
+        """
+        with self.lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        time.sleep(delay)
+        return fail
+
+
+def _pick(options, text):
+    """Deterministic choice so repeated runs give the same answers."""
+    digest = hashlib.md5(text.encode('utf-8')).digest()
+    return options[digest[0] % len(options)]
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    faults = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_rate_limited(self):
+        self.send_json(429, {'error': {'message': 'Rate limit reached', 'type': 'requests',
+                                       'code': 'rate_limit_exceeded'}},
+                       {'Retry-After': str(self.faults.retry_after)})
+
+
+class FakeOpenAIHandler(_StubHandler):
+    """POST /v1/chat/completions answering the three prompts of the enrichment code"""
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        if not self.path.endswith('/chat/completions'):
+            self.send_json(404, {'error': {'message': 'not found'}})
+            return
+        if self.faults.apply():
+            self.send_rate_limited()
+            return
+
+        system = request['messages'][0]['content']
+        user = request['messages'][-1]['content']
+        if 'response_format' in request:
+            items = [json.loads(line) for line in (line.strip() for line in user.splitlines())
+                     if line.startswith('{"id"') and '"title"' in line]
+            content = json.dumps({'results': [
+                {'id': item['id'], 'location': _pick(LOCATIONS + [None], item['title']),
+                 'category': _pick(CATEGORIES, item['title'])} for item in items]}, ensure_ascii=False)
+        elif 'мест' in system:
+            content = _pick(LOCATIONS + ["Unknown"], user)
+        else:
+            content = _pick(CATEGORIES, user)
+
+        prompt_tokens = sum(len(m['content']) for m in request['messages']) // 3
+        completion_tokens = len(content) // 3 + 1
+        self.send_json(200, {
+            'id': 'chatcmpl-benchmark',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'benchmark'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content},
+                         'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens},
+        }, {'x-ratelimit-remaining-requests': '10000', 'x-ratelimit-remaining-tokens': '10000000'})
+
+
+class FakeYandexHandler(_StubHandler):
+    """GET /1.x/?geocode=... answering with a point near Moscow derived from the address"""
+
+    def do_GET(self):
+        query = parse_qs(urlsplit(self.path).query)
+        if self.faults.apply():
+            self.send_rate_limited()
+            return
+        address = query.get('geocode', [''])[0]
+        digest = hashlib.md5(address.encode('utf-8')).digest()
+        latitude = 55.5 + digest[0] / 255 * 0.5
+        longitude = 37.3 + digest[1] / 255 * 0.6
+        members = [{'GeoObject': {'Point': {'pos': f"{longitude:.6f} {latitude:.6f}"}}}] if address else []
+        self.send_json(200, {'response': {'GeoObjectCollection': {'featureMember': members}}})
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Serves recorded or generated listing and article pages from a directory"""
+
+    protocol_version = 'HTTP/1.1'
+    faults = None
+    extensions_map = {**SimpleHTTPRequestHandler.extensions_map, '.html': 'text/html; charset=utf-8'}
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.faults.apply():
+            self.send_response(429)
+            self.send_header('Retry-After', str(self.faults.retry_after))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        super().do_GET()
+
+
+class StubServer:
+    """Runs a handler class on 127.0.0.1 in a background thread"""
+
+    def __init__(self, handler, faults, directory=None):
+        attributes = {'faults': faults}
+        if directory:
+            def init(self, *args, **kwargs):
+                SimpleHTTPRequestHandler.__init__(self, *args, directory=directory, **kwargs)
+            attributes['__init__'] = init
+        self.faults = faults
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), type(handler.__name__, (handler,), attributes))
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
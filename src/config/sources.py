@@ -1,4 +1,13 @@
-"""Configuration of news sources to be parsed"""
+"""Configuration of news sources to be parsed
+
+Optional per-source keys:
+    requests_per_second: politeness rate for the source's host, shared by all workers
+    burst: number of requests to the host allowed back to back before throttling
+    max_concurrency: maximum number of article pages fetched at once for static sources
+    request_timeout: timeout in seconds for a single HTTP request
+    page_wait_timeout: upper bound in seconds for a rendered page to become ready
+    scroll_wait_timeout: upper bound in seconds for new entries to appear after scrolling or "load more"
+"""
 
 SOURCES_CONFIG = [
     {
@@ -11,7 +20,9 @@ SOURCES_CONFIG = [
         'date_selector': 'time.xtn0kl0',
         'content_selector': 'main p',
         'js_rendered': True,
-        'pagination_direct_url': '?page={}'
+        'pagination_direct_url': '?page={}',
+        'page_wait_timeout': 15,
+        'scroll_wait_timeout': 10
     },
     {
         'url': 'https://78.ru/news/proisshestviya',
@@ -22,7 +33,9 @@ SOURCES_CONFIG = [
         'date_selector': '.author-and-date_containerDate__EJTrp',
         'content_selector': 'div.publication__body',
         'js_rendered': True,
-        'base_url': 'https://78.ru/news/'
+        'base_url': 'https://78.ru/news/',
+        'page_wait_timeout': 15,
+        'scroll_wait_timeout': 10
     },
     {
         'url': 'https://pravda-nn.ru/incidents/',
@@ -35,7 +48,9 @@ SOURCES_CONFIG = [
         'js_rendered': True,
         'base_url': 'https://pravda-nn.ru/news/',
         'pagination_type': 'load_more',
-        'pagination_selector': 'div.ias-trigger'
+        'pagination_selector': 'div.ias-trigger',
+        'page_wait_timeout': 15,
+        'scroll_wait_timeout': 10
     },
     {
         'url': 'https://pobeda26.ru/news/proisshestviya',
@@ -45,6 +60,8 @@ SOURCES_CONFIG = [
         'title_selector': 'h1.leading-none',
         'date_selector': 'div.absolute',
         'content_selector': 'div.Common_common__MfItd',
-        'js_rendered': True
+        'js_rendered': True,
+        'page_wait_timeout': 15,
+        'scroll_wait_timeout': 10
     }
 ]
\ No newline at end of file
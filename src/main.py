@@ -1,13 +1,18 @@
 """Main entry point for the news parser application"""
 
 import os
+import multiprocessing
 import concurrent.futures
-import pandas as pd
 from datetime import datetime
 
 from src.parsers.news_parser import NewsParser
-from src.utils.db_handler import save_to_mongodb
-from src.utils.classification import process_articles_batch
+from src.parsers.html_backend import compile_selectors
+from src.pipeline import StreamingPipeline
+from src.utils.geocode_cache import get_geocode_cache
+from src.utils.db_handler import get_collection
+from src.worker import run_worker
+from src.utils import MONGO_ENABLED, ENRICHMENT_QUEUE, ENRICHMENT_WORKERS
+from src.utils.rate_limiter import start_scheduler_manager, install_scheduler
 from src.config.sources import SOURCES_CONFIG
 
 # Configuration
@@ -32,45 +37,76 @@ def process_source(source_config):
     
     return articles
 
-def main():
-    """Main function to run the entire pipeline."""
-    print(f"Starting to parse {len(SOURCES_CONFIG)} sources in parallel with {MAX_WORKERS} workers...")
-    all_articles = []
-    # Step 1: Parse all sources in parallel
-    with concurrent.futures.ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        results = list(executor.map(process_source, SOURCES_CONFIG))
-        
-    # Flatten results
-    for result in results:
-        all_articles.extend(result)
-    print(f"Total articles collected: {len(all_articles)}")
-    
-    # Ensure data directory exists
-    os.makedirs("data", exist_ok=True)
-    
-    # Save raw articles
-    df_raw = pd.DataFrame(all_articles)
-    df_raw.to_csv("data/raw_articles.csv", index=False)
-    print("Saved raw articles to data/raw_articles.csv")
+def start_workers(count):
+    """
+    Start local enrichment workers that exit once scraping is over and the work queue is empty
 
-    # Step 2: Process articles in batches to add locations, geocodes, and categories
-    batch_size = 10  # Process in small batches to avoid API rate limits
-    processed_articles = []
-    
-    for i in range(0, len(all_articles), batch_size):
-        batch = all_articles[i:i+batch_size]
-        enriched_batch = process_articles_batch(batch)
-        processed_articles.extend(enriched_batch)
-        
-    # Save enriched articles
-    df_processed = pd.DataFrame(processed_articles)
-    df_processed.to_csv("data/processed_articles.csv", index=False)
-    print("Saved processed articles to data/processed_articles.csv")
-    
-    # Step 3: Save to MongoDB
-    save_to_mongodb(processed_articles)
+    Returns:
+        tuple: (processes, event to set when scraping is over)
+    """
+    # Spawned rather than forked: MongoDB clients must not be shared with child processes
+    context = multiprocessing.get_context('spawn')
+    producers_done = context.Event()
+    processes = [context.Process(target=run_worker, kwargs={'producers_done': producers_done},
+                                 name=f"enrichment-worker-{i}")
+                 for i in range(count)]
+    for process in processes:
+        process.start()
+    return processes, producers_done
+
+def main(sources=SOURCES_CONFIG, pipeline=None):
+    """
+    Main function to run the entire pipeline.
+
+    Args:
+        sources: Source configurations to parse (SOURCES_CONFIG by default)
+        pipeline: StreamingPipeline to run them through (a new one by default)
+
+    Returns:
+        StreamingPipeline: Finished pipeline with its stats and stage timings
+    """
+    print(f"Starting to parse {len(sources)} sources in parallel with {MAX_WORKERS} workers...")
+    # Compile every source's selectors up front so a broken selector fails fast
+    for source_config in sources:
+        compile_selectors(source_config)
+    if MONGO_ENABLED:
+        # Connect and provision indexes before the first batch arrives
+        try:
+            get_collection()
+        except Exception as e:
+            print(f"Warning: could not prepare MongoDB collection: {e}")
+    # Scrape, dedup, enrich and persist as a stream; one scheduler paces requests per host across all workers
+    manager, scheduler = start_scheduler_manager()
+    workers, producers_done = [], None
+    if ENRICHMENT_QUEUE and ENRICHMENT_WORKERS:
+        # Enrichment runs in worker processes fed by the MongoDB work queue; more can join from other hosts
+        workers, producers_done = start_workers(ENRICHMENT_WORKERS)
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=MAX_WORKERS, initializer=install_scheduler,
+                                                    initargs=(scheduler,)) as executor:
+            pipeline = pipeline or StreamingPipeline()
+            stats = pipeline.run(executor, process_source, sources)
+    finally:
+        manager.shutdown()
+        if producers_done is not None:
+            producers_done.set()
+        for worker in workers:
+            worker.join()
+
+    print(f"Total articles collected: {stats['scraped']}, near-duplicates: {stats['duplicates']}, "
+          f"enriched: {stats['enriched']}, saved: {stats['persisted']}")
+    if pipeline.work_queue is not None:
+        print(f"Queued for enrichment: {stats['queued']}, work queue: {pipeline.work_queue.counts()}")
+    if pipeline.processed_output is None:
+        print(f"Saved raw articles to {pipeline.raw_output.path}; processed articles are in MongoDB")
+    else:
+        print(f"Saved raw articles to {pipeline.raw_output.path} and processed articles to {pipeline.processed_output.path}")
+    geocode_cache = get_geocode_cache()
+    if geocode_cache:
+        print(f"Geocode cache: {geocode_cache.stats()}")
     
     print("News processing pipeline completed successfully!")
+    return pipeline
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
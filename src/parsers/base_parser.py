@@ -1,8 +1,9 @@
 from abc import ABC, abstractmethod
-from selenium import webdriver
 from bs4 import BeautifulSoup
-import time
-import requests
+
+from src.parsers.browser_pool import get_browser_pool
+from src.parsers.waits import wait_for_page, DEFAULT_PAGE_WAIT
+from src.utils.http_client import fetch_text
 
 class BaseParser(ABC):
     """Base class for all parsers"""
@@ -11,28 +12,19 @@ class BaseParser(ABC):
         self.driver = None
         
     def initialize_driver(self):
-        """Initialize Selenium WebDriver with recommended options"""
-        options = webdriver.ChromeOptions()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument("--disable-gpu")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-        driver = webdriver.Chrome(options=options)
-        driver.set_page_load_timeout(30)
-        return driver
+        """Borrow a Selenium WebDriver from the process-wide browser pool"""
+        return get_browser_pool().acquire()
     
-    def get_soup_from_selenium(self, url, need_reload=True, wait_time=15):
-        """Get BeautifulSoup object from URL using Selenium for JavaScript rendering."""
+    def get_soup_from_selenium(self, url, need_reload=True, wait_time=DEFAULT_PAGE_WAIT, ready_selector=None):
+        """Get BeautifulSoup object from URL using Selenium, waiting at most wait_time seconds for the page to be ready."""
         if self.driver is None:
             self.driver = self.initialize_driver()
 
         try:
             if need_reload:
                 self.driver.get(url)
-                # Wait for the page to load completely
-                time.sleep(wait_time)
+                # Wait until the page is usable instead of sleeping a fixed time
+                wait_for_page(self.driver, ready_selector, wait_time)
 
             # Get the page source after JavaScript execution
             page_source = self.driver.page_source
@@ -43,18 +35,16 @@ class BaseParser(ABC):
             
     def get_soup_from_requests(self, url):
         """Get BeautifulSoup object from URL using requests"""
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            return BeautifulSoup(response.text, 'html.parser')
-        except Exception as e:
-            print(f"Error fetching {url} with requests: {e}")
+        html = fetch_text(url)
+        if html is None:
             return None
+        return BeautifulSoup(html, 'html.parser')
             
     def __del__(self):
-        """Clean up resources"""
+        """Return the driver to the browser pool"""
         if self.driver:
-            self.driver.quit()
+            get_browser_pool().release(self.driver)
+            self.driver = None
     
     @abstractmethod
     def parse(self):
@@ -0,0 +1,157 @@
+"""Pool of long-lived headless Chrome drivers shared by the parsers of one process"""
+
+import atexit
+import queue
+import threading
+from multiprocessing import util as mp_util
+from selenium import webdriver
+
+# Import settings from __init__.py
+from src.utils import BROWSER_POOL_SIZE, BROWSER_MAX_PAGES, BROWSER_BLOCKED_URLS, HTTP_USER_AGENT
+
+# Resource types that are never needed to extract text from a page
+BLOCKED_EXTENSIONS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.avif",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.m3u8", "*.ts"
+]
+
+# Third-party analytics, ads and widget scripts commonly embedded by news sites
+BLOCKED_THIRD_PARTY = [
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*mc.yandex.ru*", "*an.yandex.ru*", "*yastatic.net/pcode*", "*top-fwz1.mail.ru*", "*counter.yadro.ru*",
+    "*vk.com/js*", "*connect.facebook.net*", "*smi2.ru*", "*24smi.*", "*adfox.ru*", "*relap.io*"
+]
+
+
+def create_driver():
+    """
+    Start a headless Chrome with eager page loading and heavy resources blocked
+
+    Returns:
+        webdriver.Chrome: New driver instance
+    """
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument(f"--user-agent={HTTP_USER_AGENT}")
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.managed_default_content_settings.media_stream": 2,
+        "profile.default_content_setting_values.notifications": 2
+    })
+    # Return control once the DOM is ready instead of waiting for every subresource
+    options.page_load_strategy = 'eager'
+
+    driver = webdriver.Chrome(options=options)
+    driver.set_page_load_timeout(30)
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {
+        "urls": BLOCKED_EXTENSIONS + BLOCKED_THIRD_PARTY + BROWSER_BLOCKED_URLS
+    })
+    return driver
+
+
+class BrowserPool:
+    """Bounded pool of Chrome drivers that are borrowed per source and returned afterwards"""
+
+    def __init__(self, size=BROWSER_POOL_SIZE, max_pages=BROWSER_MAX_PAGES):
+        self.size = size
+        self.max_pages = max_pages
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """
+        Borrow a driver, starting a new one only if the pool is not full yet
+
+        Args:
+            timeout (float): Seconds to wait for a free driver (None waits forever)
+
+        Returns:
+            webdriver.Chrome: Driver owned by the caller until release()
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._all) < self.size:
+                driver = create_driver()
+                self._all.append(driver)
+                self._pages[id(driver)] = 0
+                return driver
+
+        return self._idle.get(timeout=timeout)
+
+    def release(self, driver, pages_used=1):
+        """
+        Return a driver to the pool, recycling it if it is broken or has served too many pages
+
+        Args:
+            driver: Driver obtained from acquire()
+            pages_used (int): Number of pages loaded while borrowed
+        """
+        self._pages[id(driver)] = self._pages.get(id(driver), 0) + pages_used
+        try:
+            if self._pages[id(driver)] >= self.max_pages:
+                raise RuntimeError("page budget exhausted")
+            # Reset state so the next source starts from a clean tab
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+        except Exception:
+            self._discard(driver)
+            return
+        self._idle.put(driver)
+
+    def _discard(self, driver):
+        """Quit a driver and free its slot in the pool."""
+        with self._lock:
+            if driver in self._all:
+                self._all.remove(driver)
+            self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        """Quit every driver owned by the pool."""
+        with self._lock:
+            drivers, self._all = self._all, []
+            self._pages.clear()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        self._idle = queue.LifoQueue()
+
+
+_pool = None
+
+
+def get_browser_pool():
+    """
+    Return the browser pool of the current process, creating it on first use
+
+    Worker processes of the ProcessPoolExecutor in main.py keep their pool between sources,
+    so Chrome is started once per worker instead of once per source.
+
+    Returns:
+        BrowserPool: Process-wide pool
+    """
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool()
+        # atexit does not run in multiprocessing workers, Finalize does
+        atexit.register(_pool.close)
+        mp_util.Finalize(_pool, _pool.close, exitpriority=10)
+    return _pool
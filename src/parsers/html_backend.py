@@ -0,0 +1,130 @@
+"""Pluggable HTML parsing backends with per-source precompiled CSS selectors"""
+
+from bs4 import BeautifulSoup
+
+# Import settings from __init__.py
+from src.utils import HTML_BACKEND
+
+try:
+    import lxml.etree
+    import lxml.html
+    from lxml.cssselect import CSSSelector
+except ImportError:
+    lxml = None
+
+# Keys of a source configuration that hold CSS selectors
+SELECTOR_KEYS = ('entries_selector', 'title_selector', 'date_selector', 'content_selector', 'pagination_selector')
+
+HREF_SELECTOR = '[href]'
+ANCHOR_SELECTOR = 'a'
+
+
+class SoupBackend:
+    """BeautifulSoup with the pure-Python html.parser; slow but always available"""
+
+    name = 'bs4'
+
+    def compile(self, selector):
+        return selector
+
+    def parse(self, html):
+        if not html:
+            return None
+        return BeautifulSoup(html, 'html.parser')
+
+    def select(self, node, selector):
+        return node.select(selector)
+
+    def select_one(self, node, selector):
+        return node.select_one(selector)
+
+    def text(self, element):
+        return element.get_text()
+
+    def attr(self, element, name):
+        return element.get(name)
+
+    def tag(self, element):
+        return element.name
+
+
+class LxmlBackend:
+    """libxml2 HTML parser with CSS selectors compiled to XPath once"""
+
+    name = 'lxml'
+
+    def compile(self, selector):
+        return CSSSelector(selector)
+
+    def parse(self, html):
+        if not html:
+            return None
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # Unicode input with an XML encoding declaration has to be passed as bytes
+            parser = lxml.html.HTMLParser(encoding='utf-8')
+            return lxml.html.document_fromstring(html.encode('utf-8'), parser=parser)
+        except lxml.etree.ParserError:
+            return None
+
+    def select(self, node, selector):
+        if isinstance(selector, str):
+            selector = self.compile(selector)
+        # Match BeautifulSoup semantics: the node itself is not part of its own selection
+        return [element for element in selector(node) if element is not node]
+
+    def select_one(self, node, selector):
+        matches = self.select(node, selector)
+        return matches[0] if matches else None
+
+    def text(self, element):
+        return element.text_content()
+
+    def attr(self, element, name):
+        return element.get(name)
+
+    def tag(self, element):
+        return element.tag
+
+
+_BACKENDS = {'bs4': SoupBackend, 'lxml': LxmlBackend}
+_backend = None
+_compiled = {}
+
+
+def get_backend():
+    """
+    Return the HTML backend selected by HTML_BACKEND, falling back to bs4 if lxml is missing
+
+    Returns:
+        SoupBackend or LxmlBackend: Backend instance shared by the process
+    """
+    global _backend
+    if _backend is None:
+        name = HTML_BACKEND if HTML_BACKEND in _BACKENDS else 'lxml'
+        if name == 'lxml' and lxml is None:
+            print("Warning: lxml is not installed, falling back to the bs4 HTML backend")
+            name = 'bs4'
+        _backend = _BACKENDS[name]()
+    return _backend
+
+
+def compile_selectors(source_config):
+    """
+    Compile the CSS selectors of a source once per process
+
+    Args:
+        source_config (dict): Source entry from SOURCES_CONFIG
+
+    Returns:
+        dict: Selector key to compiled selector, plus the helper selectors used for link extraction
+    """
+    backend = get_backend()
+    key = (backend.name, source_config['source_name'])
+    if key not in _compiled:
+        compiled = {k: backend.compile(source_config[k]) for k in SELECTOR_KEYS if source_config.get(k)}
+        compiled['href'] = backend.compile(HREF_SELECTOR)
+        compiled['anchor'] = backend.compile(ANCHOR_SELECTOR)
+        _compiled[key] = compiled
+    return _compiled[key]
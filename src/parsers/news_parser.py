@@ -1,17 +1,21 @@
-import time
-import random
 import re
-import requests
 from datetime import datetime, timedelta
 from urllib.parse import urljoin
-from bs4 import BeautifulSoup
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.action_chains import ActionChains
 
+from src.parsers.browser_pool import get_browser_pool
+from src.parsers.html_backend import get_backend, compile_selectors
+from src.parsers.waits import wait_for_page, wait_for_more, DEFAULT_PAGE_WAIT, DEFAULT_SCROLL_WAIT
+from src.utils import INCREMENTAL_CRAWL
+from src.utils.http_client import fetch_text, fetch_all
+from src.utils.page_cache import get_page_cache, is_replay
+from src.utils.rate_limiter import configure_source, wait_for_slot
+from src.utils.seen_urls import SeenUrlIndex
+
 class NewsParser:
     def __init__(self, source_config):
         """
@@ -19,34 +23,59 @@ class NewsParser:
         """
         self.source_config = source_config
         self.driver = None
+        self.backend = get_backend()
+        self.selectors = compile_selectors(source_config)
+        configure_source(source_config)
+        self.pages_loaded = 0
+        # (url, seconds) of every readiness wait, for tuning per-source bounds
+        self.page_waits = []
 
     def initialize_driver(self):
-        """Initialize Selenium WebDriver."""
-        options = webdriver.ChromeOptions()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument("--disable-gpu")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-        driver = webdriver.Chrome(options=options)
-        driver.set_page_load_timeout(30)
-        return driver
-
-    def get_soup_from_selenium(self, url, need_reload=True, wait_time=15):
-        """Get BeautifulSoup object from URL using Selenium for JavaScript rendering."""
+        """Borrow a Selenium WebDriver from the process-wide browser pool."""
+        self.pages_loaded = 0
+        return get_browser_pool().acquire()
+
+    def release_driver(self):
+        """Return the borrowed WebDriver to the browser pool."""
+        if self.driver:
+            get_browser_pool().release(self.driver, self.pages_loaded)
+            self.driver = None
+
+    def record_wait(self, url, seconds):
+        """Remember how long a page actually took to become ready."""
+        self.page_waits.append((url, round(seconds, 2)))
+
+    def get_soup_from_selenium(self, url, need_reload=True, wait_time=None, ready_selector=None):
+        """
+        Get the parsed document of a URL using Selenium for JavaScript rendering.
+        Returns as soon as ready_selector is present or the DOM settles, waiting at most
+        wait_time seconds (the source's page_wait_timeout by default).
+        Rendered pages are recorded in the page cache and served from it in replay mode.
+        """
+        cache = get_page_cache()
+        if is_replay():
+            # Clicks and scrolling cannot be replayed, only freshly loaded pages
+            cached = cache.get(url) if need_reload else None
+            return self.backend.parse(cached['body']) if cached else None
+
         if self.driver is None:
             self.driver = self.initialize_driver()
 
         try:
             if need_reload:
+                wait_for_slot(url)
                 self.driver.get(url)
-                # Wait for the page to load completely
-                time.sleep(wait_time)
+                self.pages_loaded += 1
+                # Wait until the page is usable instead of sleeping a fixed time
+                if wait_time is None:
+                    wait_time = self.source_config.get('page_wait_timeout', DEFAULT_PAGE_WAIT)
+                self.record_wait(url, wait_for_page(self.driver, ready_selector, wait_time))
 
             # Get the page source after JavaScript execution
             page_source = self.driver.page_source
-            return BeautifulSoup(page_source, 'html.parser')
+            if cache and need_reload:
+                cache.put(url, page_source)
+            return self.backend.parse(page_source)
         except Exception as e:
             print(f"Error fetching {url} with Selenium: {e}")
             return None
@@ -99,36 +128,42 @@ class NewsParser:
             print(f"Error parsing date '{date_text}': {e}")
             return datetime.now()
 
-    def extract_article_data(self, article_url, source_config):
-        """Extract data from a single article page."""
-        if source_config.get('js_rendered', False):
-            soup = self.get_soup_from_selenium(article_url)
+    def extract_article_data(self, article_url, source_config, html=None):
+        """
+        Extract data from a single article page.
+        If html is given (prefetched by the async engine), it is parsed instead of fetching the page again.
+        """
+        if html is not None:
+            soup = self.backend.parse(html)
+        elif source_config.get('js_rendered', False):
+            soup = self.get_soup_from_selenium(article_url, ready_selector=source_config['content_selector'])
         else:
-            response = requests.get(article_url)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            html = fetch_text(article_url, source_config.get('request_timeout'))
+            soup = self.backend.parse(html)
 
-        if not soup:
+        if soup is None:
             return None
 
         try:
-            title_element = soup.select_one(source_config['title_selector'])
-            title = title_element.get_text().strip() if title_element else "No title found"
+            backend = self.backend
+            title_element = backend.select_one(soup, self.selectors['title_selector'])
+            title = backend.text(title_element).strip() if title_element is not None else "No title found"
             if title == "No title found":
                 return None
 
-            date_element = soup.select_one(source_config['date_selector'])
-            date_text = date_element.get_text().strip() if date_element else ""
+            date_element = backend.select_one(soup, self.selectors['date_selector'])
+            date_text = backend.text(date_element).strip() if date_element is not None else ""
             date = self.parse_date(date_text, source_config.get('date_format', '')) if date_text else None
 
             def extract_content(soup, selector):
-                content_elements = soup.select(selector)
+                content_elements = backend.select(soup, selector)
                 if content_elements:
-                    txt = ' '.join([p.get_text().strip() for p in content_elements])
+                    txt = ' '.join([backend.text(p).strip() for p in content_elements])
                     txt = txt.replace('\xa0', ' ')
                     return txt
                 return "No content found"
 
-            content = extract_content(soup, source_config['content_selector'])
+            content = extract_content(soup, self.selectors['content_selector'])
 
             return {
                 'title': title,
@@ -144,23 +179,25 @@ class NewsParser:
     def extract_article_url(self, element, base_url):
         """Extract article URL from an element with better fallback handling."""
         try:
+            backend = self.backend
+
             # First try to find an anchor tag
-            link_element = element.find('a')
-            if link_element and link_element.get('href'):
-                return urljoin(base_url, link_element.get('href'))
+            link_element = backend.select_one(element, self.selectors['anchor'])
+            if link_element is not None and backend.attr(link_element, 'href'):
+                return urljoin(base_url, backend.attr(link_element, 'href'))
 
             # Try to get href from the element itself
-            if element.get('href'):
-                return urljoin(base_url, element.get('href'))
+            if backend.attr(element, 'href'):
+                return urljoin(base_url, backend.attr(element, 'href'))
 
             # Look for any element with href attribute
-            hrefs = element.select('[href]')
+            hrefs = backend.select(element, self.selectors['href'])
             if hrefs:
-                return urljoin(base_url, hrefs[0].get('href'))
+                return urljoin(base_url, backend.attr(hrefs[0], 'href'))
 
             # If element is already an 'a' tag
-            if element.name == 'a' and element.get('href'):
-                return urljoin(base_url, element.get('href'))
+            if backend.tag(element) == 'a' and backend.attr(element, 'href'):
+                return urljoin(base_url, backend.attr(element, 'href'))
 
             return None
         except Exception as e:
@@ -173,17 +210,21 @@ class NewsParser:
         Returns:
             tuple: (new_current_url, new_page_count, should_continue, need_reload)
         """
+        scroll_wait = source_config.get('scroll_wait_timeout', DEFAULT_SCROLL_WAIT)
+
         # Case 1: No pagination configured - scroll down for more content
         if not source_config.get('has_pagination', False):
             if source_config.get('js_rendered', False) and self.driver:
                 try:
                     # Scroll down to load more content
+                    entries_before = len(self.backend.select(soup, self.selectors['entries_selector']))
                     self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(10)  # Wait for content to load
+                    self.record_wait(current_url, wait_for_more(
+                        self.driver, source_config['entries_selector'], entries_before, scroll_wait))
 
-                    # Check if new content was loaded
-                    new_soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-                    if len(new_soup.select(source_config['entries_selector'])) > len(soup.select(source_config['entries_selector'])):
+                    # Check if new content was loaded; count in the browser instead of re-parsing the page
+                    entries_after = len(self.driver.find_elements(By.CSS_SELECTOR, source_config['entries_selector']))
+                    if entries_after > entries_before:
                         return current_url, page_count, True, True
                     else:
                         return current_url, page_count, False, True
@@ -210,20 +251,22 @@ class NewsParser:
                 # Try to find "Load More" button if that's the pagination type
                 if source_config.get('pagination_type') == 'load_more' and 'pagination_selector' in source_config:
                     self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(5)
                     try:
-                        element = self.driver.find_element(By.CSS_SELECTOR, source_config['pagination_selector'])
+                        element = WebDriverWait(self.driver, scroll_wait).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, source_config['pagination_selector']))
+                        )
                         ActionChains(self.driver).scroll_to_element(element).perform()
-                        time.sleep(3)
                         self.driver.execute_script("window.scrollBy(0, 150);")
-                        time.sleep(3)
                         
-                        next_page_element = WebDriverWait(self.driver, 10).until(
+                        next_page_element = WebDriverWait(self.driver, scroll_wait).until(
                             EC.element_to_be_clickable((By.CSS_SELECTOR, source_config['pagination_selector']))
                         )
                         if next_page_element:
+                            entries_before = len(self.driver.find_elements(By.CSS_SELECTOR, source_config['entries_selector']))
                             next_page_element.click()
-                            time.sleep(5)  # Wait for content to load
+                            # Wait for the new entries to be appended
+                            self.record_wait(current_url, wait_for_more(
+                                self.driver, source_config['entries_selector'], entries_before, scroll_wait))
                             return current_url, page_count, True, False
                     except Exception as e:
                         print(f"Error clicking load more button: {e}")
@@ -265,17 +308,19 @@ class NewsParser:
         else:
             # Handle non-JS rendered pagination
             if 'pagination_selector' in source_config:
-                next_page_element = soup.select_one(source_config['pagination_selector'])
-                if next_page_element and next_page_element.get('href'):
-                    next_url = urljoin(base_url, next_page_element.get('href'))
+                backend = self.backend
+                next_page_element = backend.select_one(soup, self.selectors['pagination_selector'])
+                if next_page_element is not None and backend.attr(next_page_element, 'href'):
+                    next_url = urljoin(base_url, backend.attr(next_page_element, 'href'))
                     page_count += 1
                     return next_url, page_count, True, True
 
                 # Try to find next page by pattern
-                pagination_elements = soup.select(source_config['pagination_selector'])
+                pagination_elements = backend.select(soup, self.selectors['pagination_selector'])
                 for element in pagination_elements:
-                    if str(page_count + 1) in element.text or (element.get('href') and str(page_count + 1) in element.get('href')):
-                        next_url = urljoin(base_url, element.get('href'))
+                    href = backend.attr(element, 'href')
+                    if str(page_count + 1) in backend.text(element) or (href and str(page_count + 1) in href):
+                        next_url = urljoin(base_url, href)
                         page_count += 1
                         return next_url, page_count, True, True
 
@@ -296,23 +341,29 @@ class NewsParser:
         max_attempts = 5  # Maximum pagination attempts
         entry_elements = []
         need_reload = True
+        # Articles ingested on earlier runs are skipped; visited_urls covers the current run
+        seen_index = SeenUrlIndex() if INCREMENTAL_CRAWL else None
+        visited_urls = set()
+        seen_titles = set()
         
         try:
             while len(articles_data) < 30 and page_count <= max_attempts:
                 print(f"Processing page {page_count} from {source_config['source_name']}")
 
                 if source_config.get('js_rendered', False):
-                    soup = self.get_soup_from_selenium(current_url, need_reload)
+                    soup = self.get_soup_from_selenium(current_url, need_reload,
+                                                       ready_selector=source_config['entries_selector'])
                 else:
-                    response = requests.get(current_url)
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    html = fetch_text(current_url, source_config.get('request_timeout'))
+                    soup = self.backend.parse(html)
 
-                if not soup:
+                if soup is None:
                     break
                 
                 if source_config['has_pagination']:
                     entry_elements = []
-                entry_elements.extend(soup.select(source_config['entries_selector']))
+                page_entries = self.backend.select(soup, self.selectors['entries_selector'])
+                entry_elements.extend(page_entries)
                 print(f"Found {len(entry_elements)} entries")
                 
                 if not source_config['has_pagination'] and len(entry_elements) < 30:
@@ -320,35 +371,57 @@ class NewsParser:
                     if source_config.get('js_rendered', False) and self.driver:
                         try:
                             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                            time.sleep(3)
-                            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-                            entry_elements.extend(soup.select(source_config['entries_selector']))
+                            # The browser counts what is rendered now, not what earlier passes collected
+                            self.record_wait(current_url, wait_for_more(
+                                self.driver, source_config['entries_selector'], len(page_entries),
+                                source_config.get('scroll_wait_timeout', DEFAULT_SCROLL_WAIT)))
+                            soup = self.backend.parse(self.driver.page_source)
+                            entry_elements.extend(self.backend.select(soup, self.selectors['entries_selector']))
                             if not entry_elements:
                                 break
                         except Exception as e:
                             print(f"Error during scroll attempt: {e}")
                             break
-                    else:
+                    elif not entry_elements:
                         break
 
                 # Process articles on the current page
                 continue_parsing = True
                 if source_config['has_pagination'] or len(entry_elements) >= 1:
-                    for element in entry_elements:
-                        # Extract link to full article with improved extraction
-                        article_url = self.extract_article_url(element, base_url)
-                        if not article_url:
-                            continue
+                    # Extract links to full articles with improved extraction
+                    article_urls = [self.extract_article_url(element, base_url) for element in entry_elements]
+                    article_urls = [url for url in dict.fromkeys(article_urls) if url and url not in visited_urls]
+                    visited_urls.update(article_urls)
+
+                    known_urls = seen_index.known(article_urls) if seen_index else set()
+                    if article_urls and len(known_urls) == len(article_urls):
+                        print(f"All {len(article_urls)} entries on page {page_count} were already ingested, stopping")
+                        break
+                    article_urls = [url for url in article_urls if url not in known_urls]
+
+                    # Static pages are fetched concurrently up front; the engine caps requests per source
+                    prefetched = {}
+                    if not source_config.get('js_rendered', False):
+                        prefetched = fetch_all(
+                            article_urls,
+                            concurrency=source_config.get('max_concurrency'),
+                            timeout=source_config.get('request_timeout')
+                        )
 
-                        # Delay between requests to avoid overloading the server
-                        time.sleep(random.uniform(1, 3))
-                        article_data = self.extract_article_data(article_url, source_config)
-                        if article_data and article_data['date'] and article_data['title'] not in [dt['title'] for dt in articles_data]:
+                    for article_url in article_urls:
+                        if source_config.get('js_rendered', False):
+                            article_data = self.extract_article_data(article_url, source_config)
+                        elif prefetched.get(article_url):
+                            article_data = self.extract_article_data(article_url, source_config, prefetched[article_url])
+                        else:
+                            continue
+                        if article_data and article_data['date'] and article_data['title'] not in seen_titles:
                             if article_data['date'] < cutoff_date:
                                 continue_parsing = False
                                 break
 
                             articles_data.append(article_data)
+                            seen_titles.add(article_data['title'])
                             print(f"Article added: {article_data['title'][:30]}...")
 
                             if len(articles_data) >=30:
@@ -364,9 +437,14 @@ class NewsParser:
                 if not should_continue:
                     break
         finally:
-            # Clean up the driver
-            if self.driver:
-                self.driver.quit()
+            # Hand the driver back to the pool for the next source
+            self.release_driver()
+            if seen_index:
+                seen_index.close()
+
+        if self.page_waits:
+            total_wait = sum(seconds for _, seconds in self.page_waits)
+            print(f"{source_config['source_name']}: waited {total_wait:.1f}s over {len(self.page_waits)} page loads")
                 
         return articles_data
 
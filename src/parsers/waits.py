@@ -0,0 +1,89 @@
+"""Readiness-based waits for Selenium pages, replacing fixed sleeps"""
+
+import time
+from selenium.webdriver.common.by import By
+
+# Default upper bounds in seconds, overridable per source in SOURCES_CONFIG
+DEFAULT_PAGE_WAIT = 15
+DEFAULT_SCROLL_WAIT = 10
+
+POLL_INTERVAL = 0.25
+# How long the DOM has to stay unchanged to be considered settled
+SETTLE_TIME = 1.0
+
+DOM_SIZE_SCRIPT = "return [document.readyState, document.getElementsByTagName('*').length];"
+
+
+def _count(driver, selector):
+    """Number of elements matching a CSS selector on the current page."""
+    return len(driver.find_elements(By.CSS_SELECTOR, selector))
+
+
+def _poll(driver, is_ready, timeout):
+    """
+    Poll until is_ready() holds or the DOM stops changing, whichever comes first
+
+    Args:
+        driver: Selenium WebDriver
+        is_ready: Callable returning True once the page is usable (or None to rely on DOM settling only)
+        timeout (float): Upper bound in seconds
+
+    Returns:
+        float: Seconds actually waited
+    """
+    start = time.monotonic()
+    last_size = None
+    stable_since = start
+
+    while True:
+        now = time.monotonic()
+        if now - start >= timeout:
+            break
+        try:
+            if is_ready is not None and is_ready():
+                break
+            ready_state, size = driver.execute_script(DOM_SIZE_SCRIPT)
+        except Exception:
+            # Page is mid-navigation; try again on the next tick
+            ready_state, size = "loading", None
+
+        if size != last_size or ready_state == "loading":
+            last_size = size
+            stable_since = now
+        elif now - stable_since >= SETTLE_TIME:
+            break
+        time.sleep(POLL_INTERVAL)
+
+    return time.monotonic() - start
+
+
+def wait_for_page(driver, selector=None, timeout=DEFAULT_PAGE_WAIT):
+    """
+    Wait until a selector is present on a freshly loaded page or the DOM settles
+
+    Args:
+        driver: Selenium WebDriver
+        selector (str): CSS selector expected on the page, e.g. entries_selector or content_selector
+        timeout (float): Upper bound in seconds
+
+    Returns:
+        float: Seconds actually waited
+    """
+    is_ready = (lambda: _count(driver, selector) > 0) if selector else None
+    return _poll(driver, is_ready, timeout)
+
+
+def wait_for_more(driver, selector, previous_count, timeout=DEFAULT_SCROLL_WAIT):
+    """
+    Wait until more elements match a selector (after scrolling or "load more") or the DOM settles
+
+    Args:
+        driver: Selenium WebDriver
+        selector (str): CSS selector of listing entries
+        previous_count (int): Number of matches before the action
+        timeout (float): Upper bound in seconds
+
+    Returns:
+        float: Seconds actually waited
+    """
+    return _poll(driver, lambda: _count(driver, selector) > previous_count, timeout)
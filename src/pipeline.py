@@ -0,0 +1,281 @@
+"""Streaming scrape -> dedup -> enrich -> persist pipeline with bounded queues"""
+
+import os
+import time
+import queue
+import threading
+import concurrent.futures
+from contextlib import contextmanager
+import pandas as pd
+
+from src.utils.db_handler import save_to_mongodb, article_fingerprint
+from src.utils.classification import process_articles_batch
+from src.utils.dedup import NearDuplicateIndex, ENRICHMENT_FIELDS, copy_enrichment
+from src.utils.seen_urls import SeenUrlIndex
+from src.utils.parquet_store import ParquetAppender
+from src.utils.work_queue import WorkQueue
+from src.utils import (INCREMENTAL_CRAWL, PIPELINE_QUEUE_SIZE, ENRICH_BATCH_SIZE, PERSIST_BATCH_SIZE,
+                       PIPELINE_FLUSH_SECONDS, PIPELINE_OUTPUT_DIR, OUTPUT_FORMAT, MONGO_ENABLED, ENRICHMENT_QUEUE)
+
+RAW_COLUMNS = ['title', 'date', 'content', 'url', 'source_name']
+PROCESSED_COLUMNS = RAW_COLUMNS + list(ENRICHMENT_FIELDS) + ['duplicate_of']
+
+# Marks the end of a stream on a queue
+_DONE = object()
+
+
+def _timed(function, *args):
+    """Run function in an executor worker; returns its result and the seconds it took there."""
+    start = time.perf_counter()
+    return function(*args), time.perf_counter() - start
+
+
+class CsvAppender:
+    """Writes rows to a CSV file chunk by chunk with a fixed column set"""
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.rows_written = 0
+        if os.path.exists(path):
+            os.remove(path)
+
+    def append(self, rows):
+        if not rows:
+            return
+        df = pd.DataFrame(rows, columns=self.columns)
+        df.to_csv(self.path, mode='a', header=self.rows_written == 0, index=False)
+        self.rows_written += len(rows)
+
+
+class _Group:
+    """A story seen by the dedup stage: duplicates waiting for its enrichment, then the enrichment itself"""
+
+    def __init__(self):
+        self.pending = []
+        # Enrichment results once the representative has been processed
+        self.fields = None
+
+
+class StreamingPipeline:
+    """
+    Runs the stages concurrently: the main thread collects scraped articles and feeds the dedup stage,
+    while enrichment and persistence run in their own threads. Queues are bounded, so the number of
+    articles in memory depends on PIPELINE_QUEUE_SIZE and not on the size of the crawl.
+
+    With a work queue, new articles are handed to the MongoDB queue instead and enriched and
+    persisted by worker processes (src.worker); the pipeline then only scrapes and deduplicates.
+    """
+
+    def __init__(self, queue_size=PIPELINE_QUEUE_SIZE, enrich_batch_size=ENRICH_BATCH_SIZE,
+                 persist_batch_size=PERSIST_BATCH_SIZE, flush_seconds=PIPELINE_FLUSH_SECONDS,
+                 output_dir=PIPELINE_OUTPUT_DIR, output_format=OUTPUT_FORMAT, work_queue=None):
+        self.enrich_queue = queue.Queue(maxsize=queue_size)
+        self.persist_queue = queue.Queue(maxsize=queue_size)
+        self.enrich_batch_size = enrich_batch_size
+        self.persist_batch_size = persist_batch_size
+        self.flush_seconds = flush_seconds
+        self.dedup_index = NearDuplicateIndex()
+        self.lock = threading.Lock()
+        self.stats = {'scraped': 0, 'duplicates': 0, 'enriched': 0, 'persisted': 0, 'queued': 0}
+        if work_queue is None and ENRICHMENT_QUEUE:
+            work_queue = WorkQueue()
+        self.work_queue = work_queue
+        # (fingerprint, article, representative fingerprint) waiting to be sent to the work queue
+        self.outbox = []
+        self.seen_index = None
+        # Seconds spent per source (scrape), per article (dedup) and per batch (enrich, persist)
+        self.timings = {'scrape': [], 'dedup': [], 'enrich': [], 'persist': []}
+        # Stages currently working, for attributing resource samples
+        self.active = set()
+
+        os.makedirs(output_dir, exist_ok=True)
+        if output_format == 'parquet':
+            self.raw_output = ParquetAppender(os.path.join(output_dir, "raw_articles"), RAW_COLUMNS)
+            # With a work queue the workers append their own files to this dataset
+            self.processed_output = ParquetAppender(os.path.join(output_dir, "processed_articles"), PROCESSED_COLUMNS)
+        else:
+            self.raw_output = CsvAppender(os.path.join(output_dir, "raw_articles.csv"), RAW_COLUMNS)
+            # Workers write no CSV, so with a work queue there is no processed file at all
+            self.processed_output = None if self.work_queue is not None else CsvAppender(
+                os.path.join(output_dir, "processed_articles.csv"), PROCESSED_COLUMNS)
+
+    @contextmanager
+    def stage(self, name):
+        """Record the duration of one unit of work of a stage."""
+        self.active.add(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name].append(time.perf_counter() - start)
+            self.active.discard(name)
+
+    def _take_batch(self, q, size):
+        """
+        Collect up to size items, returning early when the queue stays empty for flush_seconds
+
+        Returns:
+            tuple: (items, finished) where finished means the end marker was reached
+        """
+        items = []
+        while len(items) < size:
+            try:
+                item = q.get(timeout=self.flush_seconds if items else None)
+            except queue.Empty:
+                break
+            if item is _DONE:
+                return items, True
+            items.append(item)
+        return items, False
+
+    def dedup(self, article):
+        """Send new stories to enrichment; park or resolve near-duplicates of known ones."""
+        if self.work_queue is not None:
+            self.dedup_to_queue(article)
+            return
+        self.stats['scraped'] += 1
+        group = _Group()
+        with self.stage('dedup'):
+            existing = self.dedup_index.add(article, payload=group)
+        if existing is None:
+            article['_group'] = group
+            self.enrich_queue.put(article)
+            return
+
+        self.stats['duplicates'] += 1
+        with self.lock:
+            if existing.fields is None:
+                existing.pending.append(article)
+                return
+        copy_enrichment(existing.fields, [article])
+        self.persist_queue.put(article)
+
+    def dedup_to_queue(self, article):
+        """Queue an article for the workers, pointing near-duplicates at their representative."""
+        self.stats['scraped'] += 1
+        fingerprint = article_fingerprint(article)
+        with self.stage('dedup'):
+            representative = self.dedup_index.add(article, payload=fingerprint)
+        if representative is not None:
+            self.stats['duplicates'] += 1
+        self.outbox.append((fingerprint, article, representative))
+        if len(self.outbox) >= self.persist_batch_size:
+            self.flush_outbox()
+
+    def flush_outbox(self):
+        """Send buffered articles to the work queue; they count as seen once the queue holds them."""
+        if not self.outbox:
+            return
+        with self.stage('persist'):
+            self.stats['queued'] += self.work_queue.enqueue(self.outbox)
+            if self.seen_index:
+                self.seen_index.add([article for _, article, _ in self.outbox])
+        self.outbox = []
+
+    def enrich_worker(self):
+        """Enrich representatives in batches and hand them to the persist stage."""
+        finished = False
+        while not finished:
+            batch, finished = self._take_batch(self.enrich_queue, self.enrich_batch_size)
+            if not batch:
+                continue
+            try:
+                with self.stage('enrich'):
+                    process_articles_batch(batch)
+            except Exception as e:
+                print(f"Error enriching batch, persisting it without enrichment: {e}")
+            self.stats['enriched'] += len(batch)
+
+            for article in batch:
+                self.persist_queue.put(article)
+        self.persist_queue.put(_DONE)
+
+    def release_duplicates(self, batch):
+        """Copy enrichment onto duplicates parked while their representatives were in flight."""
+        released = []
+        with self.lock:
+            for article in batch:
+                group = article.pop('_group', None)
+                if group is None or group.fields is not None:
+                    continue
+                group.fields = {field: article[field] for field in ENRICHMENT_FIELDS if field in article}
+                group.fields['url'] = article.get('url')
+                released.extend((group.fields, duplicate) for duplicate in group.pending)
+                group.pending = []
+        for fields, duplicate in released:
+            copy_enrichment(fields, [duplicate])
+        return [duplicate for _, duplicate in released]
+
+    def persist_worker(self):
+        """Write enriched articles to CSV, MongoDB and the seen-URL index in batches."""
+        seen_index = SeenUrlIndex() if INCREMENTAL_CRAWL else None
+        finished = False
+        while not finished:
+            batch, finished = self._take_batch(self.persist_queue, self.persist_batch_size)
+            batch.extend(self.release_duplicates(batch))
+            if not batch:
+                continue
+            # A failing batch must not stop this thread: enrich_worker would block on the full queue
+            try:
+                with self.stage('persist'):
+                    self.processed_output.append(batch)
+                    saved = batch
+                    if MONGO_ENABLED:
+                        failed = set(save_to_mongodb(batch)['failed_fingerprints'])
+                        saved = [article for article in batch if article_fingerprint(article) not in failed]
+                    # Articles that did not reach MongoDB are not marked as seen, so the next crawl fetches them again
+                    if seen_index:
+                        seen_index.add(saved)
+            except Exception as e:
+                print(f"Error persisting batch of {len(batch)} articles: {e}")
+                continue
+            self.stats['persisted'] += len(saved)
+        if seen_index:
+            seen_index.close()
+
+    def run(self, executor, process_source, sources):
+        """
+        Scrape the sources on the executor and stream their articles through the pipeline
+
+        Args:
+            executor: concurrent.futures executor running process_source
+            process_source: Function returning the articles of one source
+            sources: List of source configurations
+
+        Returns:
+            dict: Counters of scraped, duplicate, enriched, persisted and queued articles
+        """
+        threads = []
+        if self.work_queue is None:
+            threads = [threading.Thread(target=self.enrich_worker, name="enrich", daemon=True),
+                       threading.Thread(target=self.persist_worker, name="persist", daemon=True)]
+        else:
+            self.seen_index = SeenUrlIndex() if INCREMENTAL_CRAWL else None
+        for thread in threads:
+            thread.start()
+
+        try:
+            # Each source is timed inside its worker, so time spent queued for a free worker is not counted
+            futures = [executor.submit(_timed, process_source, source) for source in sources]
+            # Sources are handed downstream as soon as each one finishes, slow ones do not hold up the rest
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    articles, seconds = future.result()
+                except Exception as e:
+                    print(f"Error parsing source: {e}")
+                    continue
+                self.timings['scrape'].append(seconds)
+                self.raw_output.append(articles)
+                for article in articles:
+                    self.dedup(article)
+        finally:
+            if self.work_queue is not None:
+                self.flush_outbox()
+                if self.seen_index:
+                    self.seen_index.close()
+            self.enrich_queue.put(_DONE)
+            for thread in threads:
+                thread.join()
+
+        return self.stats
@@ -7,7 +7,119 @@ import datetime
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
 YANDEX_API_KEY = os.environ.get("YANDEX_API_KEY", "")
 
+# API endpoints (overridden to point at local stand-ins, e.g. by the benchmark)
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL", "") or None
+YANDEX_GEOCODER_URL = os.environ.get("YANDEX_GEOCODER_URL", "https://geocode-maps.yandex.ru/1.x/")
+
 # MongoDB settings
 MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017/")
 MONGO_DB = os.environ.get("MONGO_DB", "news_classification")
-MONGO_COLLECTION = os.environ.get("MONGO_COLLECTION", "events")
\ No newline at end of file
+MONGO_COLLECTION = os.environ.get("MONGO_COLLECTION", "events")
+MONGO_ENABLED = os.environ.get("MONGO_ENABLED", "1") == "1"
+# Write concern of article upserts (w=1 without journaling favours throughput; use "majority" for durability)
+MONGO_WRITE_W = os.environ.get("MONGO_WRITE_W", "1")
+MONGO_WRITE_JOURNAL = os.environ.get("MONGO_WRITE_JOURNAL", "0") == "1"
+MONGO_BULK_BATCH_SIZE = int(os.environ.get("MONGO_BULK_BATCH_SIZE", 1000))
+
+# Precomputed map clusters read by the frontend's /api/clusters; kept up to date by every upsert
+CLUSTERS_ENABLED = os.environ.get("CLUSTERS_ENABLED", "1") == "1"
+CLUSTERS_COLLECTION = os.environ.get("CLUSTERS_COLLECTION", "event_clusters")
+CLUSTER_MAX_ZOOM = int(os.environ.get("CLUSTER_MAX_ZOOM", 16))
+# Map tile versions, bumped for the tiles touched by every upsert so the frontend's tile cache stays valid
+TILE_VERSIONS_ENABLED = os.environ.get("TILE_VERSIONS_ENABLED", "1") == "1"
+TILE_VERSIONS_COLLECTION = os.environ.get("TILE_VERSIONS_COLLECTION", "tile_versions")
+TILE_VERSION_MAX_ZOOM = int(os.environ.get("TILE_VERSION_MAX_ZOOM", 16))
+
+# HTTP fetching settings
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", 20))
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 3))
+HTTP_CONCURRENCY_PER_SOURCE = int(os.environ.get("HTTP_CONCURRENCY_PER_SOURCE", 8))
+HTTP_USER_AGENT = os.environ.get(
+    "HTTP_USER_AGENT",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+
+# Headless browser pool settings
+BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", 1))
+BROWSER_MAX_PAGES = int(os.environ.get("BROWSER_MAX_PAGES", 500))
+BROWSER_BLOCKED_URLS = [p for p in os.environ.get("BROWSER_BLOCKED_URLS", "").split(",") if p]
+
+# Incremental crawling settings
+INCREMENTAL_CRAWL = os.environ.get("INCREMENTAL_CRAWL", "1") == "1"
+SEEN_URLS_PATH = os.environ.get("SEEN_URLS_PATH", "data/seen_urls.sqlite")
+
+# Page cache settings (PAGE_CACHE_MODE: off, on or replay)
+PAGE_CACHE_MODE = os.environ.get("PAGE_CACHE_MODE", "off")
+PAGE_CACHE_DIR = os.environ.get("PAGE_CACHE_DIR", "data/page_cache")
+PAGE_CACHE_MAX_MB = int(os.environ.get("PAGE_CACHE_MAX_MB", 512))
+
+# HTML parsing backend: lxml (fast, default) or bs4
+HTML_BACKEND = os.environ.get("HTML_BACKEND", "lxml")
+
+# Per-host politeness defaults. They cap every host at POLITENESS_RATE requests per second after a
+# burst of POLITENESS_BURST, whatever HTTP_CONCURRENCY_PER_SOURCE is: with 0.5 rps the concurrent
+# fetches of a source mostly wait for their slots. Raise requests_per_second for sources that allow it.
+POLITENESS_RATE = float(os.environ.get("POLITENESS_RATE", 0.5))
+POLITENESS_BURST = int(os.environ.get("POLITENESS_BURST", 2))
+POLITENESS_JITTER = float(os.environ.get("POLITENESS_JITTER", 0.5))
+
+# Near-duplicate detection: minimum estimated Jaccard similarity of title+content shingles
+DEDUP_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", 0.7))
+
+# Streaming pipeline settings
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", 100))
+ENRICH_BATCH_SIZE = int(os.environ.get("ENRICH_BATCH_SIZE", 20))
+PERSIST_BATCH_SIZE = int(os.environ.get("PERSIST_BATCH_SIZE", 100))
+PIPELINE_FLUSH_SECONDS = float(os.environ.get("PIPELINE_FLUSH_SECONDS", 5))
+PIPELINE_OUTPUT_DIR = os.environ.get("PIPELINE_OUTPUT_DIR", "data")
+# Output format: csv (whole files rewritten per run) or parquet (datasets partitioned by day and source)
+OUTPUT_FORMAT = os.environ.get("OUTPUT_FORMAT", "csv")
+PARQUET_COMPRESSION = os.environ.get("PARQUET_COMPRESSION", "zstd")
+
+# Enrichment work queue in MongoDB: the pipeline only enqueues new articles and any number of workers
+# (python -m src.worker, on any host) claim, enrich and persist them; ENRICHMENT_WORKERS are started locally
+ENRICHMENT_QUEUE = os.environ.get("ENRICHMENT_QUEUE", "0") == "1"
+MONGO_QUEUE_COLLECTION = os.environ.get("MONGO_QUEUE_COLLECTION", "enrichment_queue")
+ENRICHMENT_WORKERS = int(os.environ.get("ENRICHMENT_WORKERS", 2))
+QUEUE_LEASE_SECONDS = float(os.environ.get("QUEUE_LEASE_SECONDS", 600))
+QUEUE_MAX_ATTEMPTS = int(os.environ.get("QUEUE_MAX_ATTEMPTS", 5))
+QUEUE_RETRY_SECONDS = float(os.environ.get("QUEUE_RETRY_SECONDS", 30))
+QUEUE_POLL_SECONDS = float(os.environ.get("QUEUE_POLL_SECONDS", 5))
+
+# Batched LLM enrichment: one request returns location and category for up to LLM_BATCH_SIZE articles
+LLM_BATCH_ENRICHMENT = os.environ.get("LLM_BATCH_ENRICHMENT", "1") == "1"
+LLM_BATCH_SIZE = int(os.environ.get("LLM_BATCH_SIZE", 20))
+
+# Shared LLM client: concurrent requests, requests/tokens per minute budget and retries
+LLM_MODEL = os.environ.get("LLM_MODEL", "gpt-3.5-turbo")
+LLM_CONCURRENCY = int(os.environ.get("LLM_CONCURRENCY", 8))
+LLM_RPM = int(os.environ.get("LLM_RPM", 3500))
+LLM_TPM = int(os.environ.get("LLM_TPM", 90000))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", 5))
+
+# Persistent LLM result cache
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", "data/llm_cache.sqlite")
+LLM_CACHE_MEMORY_ITEMS = int(os.environ.get("LLM_CACHE_MEMORY_ITEMS", 10000))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 500000))
+LLM_CACHE_MAX_AGE_DAYS = float(os.environ.get("LLM_CACHE_MAX_AGE_DAYS", 90))
+
+# Geocoding cache (negative results expire sooner so that fixed geocoder data is picked up)
+GEOCODE_CACHE_ENABLED = os.environ.get("GEOCODE_CACHE_ENABLED", "1") == "1"
+GEOCODE_CACHE_PATH = os.environ.get("GEOCODE_CACHE_PATH", "data/geocode_cache.sqlite")
+GEOCODE_CACHE_TTL_DAYS = float(os.environ.get("GEOCODE_CACHE_TTL_DAYS", 180))
+GEOCODE_NEGATIVE_TTL_DAYS = float(os.environ.get("GEOCODE_NEGATIVE_TTL_DAYS", 7))
+GEOCODE_CACHE_MEMORY_ITEMS = int(os.environ.get("GEOCODE_CACHE_MEMORY_ITEMS", 5000))
+
+# Offline gazetteer geocoder (GeoNames dump such as RU.txt); skipped when the file is absent
+GAZETTEER_PATH = os.environ.get("GAZETTEER_PATH", "data/gazetteer/RU.txt")
+GAZETTEER_MIN_POPULATION = int(os.environ.get("GAZETTEER_MIN_POPULATION", 1000))
+GAZETTEER_FUZZY_CUTOFF = float(os.environ.get("GAZETTEER_FUZZY_CUTOFF", 0.85))
+
+# Local category classifier; titles below the confidence threshold are sent to the LLM
+LOCAL_CLASSIFIER_ENABLED = os.environ.get("LOCAL_CLASSIFIER_ENABLED", "1") == "1"
+LOCAL_CLASSIFIER_MODEL_PATH = os.environ.get("LOCAL_CLASSIFIER_MODEL_PATH", "data/category_model.json")
+LOCAL_CLASSIFIER_THRESHOLD = float(os.environ.get("LOCAL_CLASSIFIER_THRESHOLD", 0.8))
+
+# Local location extraction (address regexes and gazetteer names) ahead of the LLM
+LOCAL_LOCATION_EXTRACTION = os.environ.get("LOCAL_LOCATION_EXTRACTION", "1") == "1"
@@ -1,31 +1,21 @@
 """Classification utilities for the news parser"""
 
-from openai import OpenAI
+import json
+import asyncio
 from tqdm import tqdm
 
 # Import settings from __init__.py
-from src.utils import OPENAI_API_KEY
-from src.utils.geocoding import extract_location_from_text, get_geocode
+from src.utils import OPENAI_API_KEY, LLM_BATCH_ENRICHMENT, LLM_BATCH_SIZE, LLM_MODEL
+from src.utils.geocoding import extract_location_from_text_async, get_geocode
+from src.utils.llm_client import get_llm_client, LLMError
+from src.utils.llm_cache import get_llm_cache, prompt_version, MISS
+from src.utils.local_classifier import classify_locally
+from src.utils.location_extractor import extract_location_locally
 from datetime import datetime, timedelta
 
-def classify_news_event(text):
-    """
-    Classify news event using OpenAI GPT
-    
-    Args:
-        text (str): News title and possibly content
-        
-    Returns:
-        str: Category from predefined list
-    """
-    if not OPENAI_API_KEY:
-        print("Warning: OpenAI API key not set, skipping classification")
-        return "Другое"
-        
-    client = OpenAI(api_key=OPENAI_API_KEY)
-    
-    CATEGORIES = "Другое, Пожар, ДТП, Кража, Нарушение_порядка, Несчастный_случай"
-    FEW_SHOT_EXAMPLES = """
+CATEGORIES = "Другое, Пожар, ДТП, Кража, Нарушение_порядка, Несчастный_случай"
+VALID_CATEGORIES = CATEGORIES.split(", ")
+FEW_SHOT_EXAMPLES = """
     Примеры классификации:
     Заголовок: "Возгорание сухой травы в парке" → Категория: Пожар
     Заголовок: "Столкновение двух автомобилей на перекрёстке" → Категория: ДТП
@@ -34,7 +24,9 @@ def classify_news_event(text):
     Заголовок: "Падение строительных лесов на прохожего" → Категория: Несчастный_случай
     Заголовок: "Открытие нового сквера в центре" → Категория: Другое
     """
-    
+
+def classification_messages(text):
+    """Chat messages asking the model for the category of a news title."""
     prompt = f"""
     {FEW_SHOT_EXAMPLES}
 
@@ -42,25 +34,221 @@ def classify_news_event(text):
 
     Заголовок: "{text}" → Категория:
     """
+    return [
+        {"role": "system", "content": "Ты опытный классификатор происшествий."},
+        {"role": "user", "content": prompt}
+    ]
+
+def batch_enrichment_messages(items):
+    """Chat messages asking for location and category of several JSON-encoded news items."""
+    prompt = f"""
+    {FEW_SHOT_EXAMPLES}
+
+    Для каждой новости ниже определи категорию (используй только эти категории: {CATEGORIES})
+    и место происшествия: адрес или место (например, "ул. Ленина, Москва", "ТЦ Мега, Химки",
+    "МКАД, 32-й километр") или null, если места в тексте нет.
+
+    Верни JSON вида {{"results": [{{"id": 0, "location": "...", "category": "..."}}]}}
+    с одним элементом для каждого id.
+
+    Новости:
+    {items}
+    """
+    return [
+        {"role": "system", "content": "Ты опытный классификатор происшествий и система извлечения мест из текста."},
+        {"role": "user", "content": prompt}
+    ]
+
+# Change whenever the wording of a prompt changes, invalidating cached answers
+CLASSIFICATION_PROMPT_VERSION = prompt_version(classification_messages("{text}"))
+BATCH_PROMPT_VERSION = prompt_version(batch_enrichment_messages("{items}"))
+
+async def classify_news_event_async(text):
+    """
+    Classify news event with the local classifier, falling back to OpenAI GPT when it is unsure
+    
+    Args:
+        text (str): News title and possibly content
+        
+    Returns:
+        str: Category from predefined list
+    """
+    category = classify_locally(text)
+    if category:
+        return category
+    return await classify_with_llm_async(text) or "Другое"
+
+async def classify_with_llm_async(text):
+    """
+    Classify news event with OpenAI GPT only
+    
+    Args:
+        text (str): News title and possibly content
+        
+    Returns:
+        str: Category from predefined list, or None when the LLM gave no answer
+    """
+    if not OPENAI_API_KEY:
+        print("Warning: OpenAI API key not set, skipping classification")
+        return None
+    
+    cache = get_llm_cache()
+    if cache:
+        cached = cache.get('category', text, CLASSIFICATION_PROMPT_VERSION, LLM_MODEL)
+        if cached is not MISS:
+            return cached
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "Ты опытный классификатор происшествий."},
-                {"role": "user", "content": prompt}
-            ],
+        category = await get_llm_client().complete(
+            messages=classification_messages(text),
             temperature=0.0,
             max_tokens=10
         )
-        category = response.choices[0].message.content.strip()
-        valid_categories = CATEGORIES.split(", ")
-        if category not in valid_categories:
-            return "Другое"
+        category = category.strip()
+        if category not in VALID_CATEGORIES:
+            category = "Другое"
+        if cache:
+            cache.put('category', text, CLASSIFICATION_PROMPT_VERSION, LLM_MODEL, category)
         return category
-    except Exception as e:
+    except LLMError as e:
         print(f"Error classifying text: {e}")
+        return None
+
+def classify_news_event(text):
+    """
+    Blocking version of classify_news_event_async
+    
+    Args:
+        text (str): News title and possibly content
+        
+    Returns:
+        str: Category from predefined list
+    """
+    category = classify_locally(text)
+    if category:
+        return category
+    
+    if not OPENAI_API_KEY:
+        print("Warning: OpenAI API key not set, skipping classification")
         return "Другое"
+    return get_llm_client().run(classify_with_llm_async(text)) or "Другое"
+
+def parse_enrichment_response(content, ids):
+    """
+    Validate the JSON answer of a batched enrichment request
+
+    Args:
+        content (str): Raw model output
+        ids (list): Item ids sent in the request
+
+    Returns:
+        dict: id -> {'location', 'category'} for every well-formed item (empty if the output is unusable)
+    """
+    try:
+        items = json.loads(content)["results"]
+    except (ValueError, KeyError, TypeError):
+        return {}
+    if not isinstance(items, list):
+        return {}
+
+    valid = {}
+    for item in items:
+        if not isinstance(item, dict) or item.get("id") not in ids or item["id"] in valid:
+            continue
+        category = item.get("category")
+        location = item.get("location")
+        if category not in VALID_CATEGORIES:
+            continue
+        if location is not None and not isinstance(location, str):
+            continue
+        if isinstance(location, str):
+            location = location.strip()
+            if not location or location == "Unknown":
+                location = None
+        valid[item["id"]] = {"location": location, "category": category}
+    return valid
+
+
+def _batch_item_text(article):
+    """Part of an article sent in a batched request, also used as its cache key."""
+    return f"{article['title']}\n{article['content'][:500]}"
+
+
+async def enrich_batch_with_llm(articles):
+    """
+    Extract location and category for several articles with a single chat request
+
+    Articles answered before are served from the LLM cache and left out of the request.
+
+    Args:
+        articles: List of article dictionaries
+
+    Returns:
+        list: {'location', 'category'} per article, in input order; category is None when the LLM gave no answer
+    """
+    cache = get_llm_cache()
+    results = [MISS] * len(articles)
+    if cache:
+        results = [cache.get('enrich', _batch_item_text(a), BATCH_PROMPT_VERSION, LLM_MODEL) for a in articles]
+
+    missing = [i for i, result in enumerate(results) if result is MISS]
+    fresh = await _enrich_uncached([articles[i] for i in missing])
+    for i, result in zip(missing, fresh):
+        results[i] = result
+        if cache and result.pop('_cacheable', True):
+            cache.put('enrich', _batch_item_text(articles[i]), BATCH_PROMPT_VERSION, LLM_MODEL, result)
+        result.pop('_cacheable', None)
+    return results
+
+
+async def _enrich_uncached(articles):
+    """
+    Batched request for articles without cached answers.
+
+    Items with malformed or invalid output are retried in smaller batches; a single
+    article that still fails falls back to the per-article prompts, whose answers are
+    not stored under the batch prompt.
+    """
+    if not articles:
+        return []
+    if len(articles) == 1:
+        results = {}
+    else:
+        items = "\n".join(
+            json.dumps({"id": i, "title": a['title'], "text": a['content'][:500]}, ensure_ascii=False)
+            for i, a in enumerate(articles)
+        )
+        try:
+            content = await get_llm_client().complete(
+                messages=batch_enrichment_messages(items),
+                temperature=0.0,
+                response_format={"type": "json_object"},
+                max_tokens=60 * len(articles) + 50
+            )
+            results = parse_enrichment_response(content, list(range(len(articles))))
+        except LLMError as e:
+            print(f"Error in batched enrichment of {len(articles)} articles: {e}")
+            results = {}
+
+    failed = [i for i in range(len(articles)) if i not in results]
+    if failed and len(articles) == 1:
+        article = articles[0]
+        # The local classifier already had its say in process_articles_batch
+        location, category = await asyncio.gather(
+            extract_location_from_text_async(f"{article['title']} {article['content'][:500]}"),
+            classify_with_llm_async(article['title'])
+        )
+        return [{"location": location, "category": category, "_cacheable": False}]
+    if failed:
+        # Split the failed items in halves and retry both halves concurrently
+        half = (len(failed) + 1) // 2
+        parts = [part for part in (failed[:half], failed[half:]) if part]
+        retried = await asyncio.gather(*[_enrich_uncached([articles[i] for i in part]) for part in parts])
+        for part, part_results in zip(parts, retried):
+            for i, result in zip(part, part_results):
+                results[i] = result
+    return [results[i] for i in range(len(articles))]
+
 
 def process_articles_batch(articles_batch):
     """
@@ -72,12 +260,24 @@ def process_articles_batch(articles_batch):
     Returns:
         List of enriched article dictionaries
     """
+    # Titles the local classifier is sure about and texts with an unambiguous address never reach the LLM
+    local_categories = [classify_locally(article['title']) for article in articles_batch]
+    local_locations = [extract_location_locally(_location_text(article)) for article in articles_batch]
+
+    if LLM_BATCH_ENRICHMENT and OPENAI_API_KEY:
+        return process_articles_batched_llm(articles_batch, local_categories, local_locations)
+
     enriched_articles = []
+    if OPENAI_API_KEY:
+        locations, categories = get_llm_client().run(
+            _extract_and_classify(articles_batch, local_categories, local_locations))
+    else:
+        print("Warning: OpenAI API key not set, skipping location extraction and classification")
+        locations = local_locations
+        categories = [None] * len(articles_batch)
     
-    for article in tqdm(articles_batch, desc="Processing articles"):
-        # Extract location from text
-        combined_text = f"{article['title']} {article['content'][:500]}"
-        location = extract_location_from_text(combined_text)
+    rows = zip(articles_batch, locations, local_categories, categories)
+    for article, location, local_category, category in tqdm(rows, total=len(articles_batch), desc="Processing articles"):
         article['location'] = location
         
         # Get geocode for location
@@ -86,9 +286,85 @@ def process_articles_batch(articles_batch):
             article['latitude'] = lat
             article['longitude'] = lng
         
-        # Classify the news event
-        article['category'] = classify_news_event(article['title'])
+        _set_category(article, local_category, category)
         
         enriched_articles.append(article)
     
-    return enriched_articles
\ No newline at end of file
+    return enriched_articles
+
+
+def _set_category(article, local_category, llm_category):
+    """Store the category of an article and where it came from; 'fallback' marks articles the LLM never answered."""
+    if local_category:
+        article['category'], article['category_source'] = local_category, 'local'
+    elif llm_category:
+        article['category'], article['category_source'] = llm_category, 'llm'
+    else:
+        article['category'], article['category_source'] = "Другое", 'fallback'
+
+
+def _location_text(article):
+    """Title and the beginning of the text, where the location of an incident is usually given."""
+    return f"{article['title']} {article['content'][:500]}"
+
+
+async def _extract_and_classify(articles, local_categories, local_locations):
+    """
+    Run location extraction and classification of articles without local answers concurrently
+
+    Returns:
+        tuple: Locations and LLM categories (None where the article had a local category or got no answer)
+    """
+    # Extract location from title and the beginning of the text, classify by title
+    unlocated = [i for i, location in enumerate(local_locations) if not location]
+    extracted = asyncio.gather(*[extract_location_from_text_async(_location_text(articles[i])) for i in unlocated])
+    pending = [i for i, category in enumerate(local_categories) if not category]
+    classified = asyncio.gather(*[classify_with_llm_async(articles[i]['title']) for i in pending])
+    locations, categories = list(local_locations), [None] * len(articles)
+    for i, category in zip(pending, await classified):
+        categories[i] = category
+    for i, location in zip(unlocated, await extracted):
+        locations[i] = location
+    return locations, categories
+
+
+def process_articles_batched_llm(articles_batch, local_categories=None, local_locations=None):
+    """
+    Enrich articles using one LLM request per LLM_BATCH_SIZE articles instead of two per article
+
+    Args:
+        articles_batch: List of article dictionaries
+        local_categories: Categories already decided by the local classifier (None where it was unsure)
+        local_locations: Locations already found by the local extractor (None where it found nothing)
+
+    Returns:
+        List of enriched article dictionaries
+    """
+    local_categories = local_categories or [None] * len(articles_batch)
+    local_locations = local_locations or [None] * len(articles_batch)
+    # Articles with both answers known locally are left out of the requests; for the rest
+    # the local answers take precedence over the model's
+    pending = [i for i in range(len(articles_batch)) if not (local_categories[i] and local_locations[i])]
+    chunks = [pending[i:i+LLM_BATCH_SIZE] for i in range(0, len(pending), LLM_BATCH_SIZE)]
+    # All chunks are in flight at once; the shared client enforces concurrency and rate limits
+    results = []
+    if chunks:
+        results = get_llm_client().run(_gather_batches([[articles_batch[i] for i in chunk] for chunk in chunks]))
+    answers = {}
+    for chunk, chunk_results in zip(chunks, results):
+        answers.update(zip(chunk, chunk_results))
+
+    for i, article in enumerate(tqdm(articles_batch, desc="Processing articles")):
+        answer = answers.get(i, {})
+        location = local_locations[i] or answer.get('location')
+        article['location'] = location
+        if location:
+            lat, lng = get_geocode(location)
+            article['latitude'] = lat
+            article['longitude'] = lng
+        _set_category(article, local_categories[i], answer.get('category'))
+    return articles_batch
+
+
+async def _gather_batches(chunks):
+    return await asyncio.gather(*[enrich_batch_with_llm(chunk) for chunk in chunks])
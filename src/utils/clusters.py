@@ -0,0 +1,139 @@
+"""Precomputed multi-resolution map clusters: per-zoom grid cells with counts, centroids and categories"""
+
+import math
+from collections import defaultdict
+from pymongo import UpdateOne, IndexModel, ASCENDING
+
+# Import settings from __init__.py
+from src.utils import CLUSTER_MAX_ZOOM
+
+# Each map tile (256 px) is split into 2**CELL_BITS x 2**CELL_BITS cells, i.e. 32 px cells
+CELL_BITS = 3
+MAX_MERCATOR_LATITUDE = 85.05112878
+# Category key for events that were not classified
+UNCLASSIFIED = 'unclassified'
+
+CLUSTER_INDEXES = [
+    IndexModel([('level', ASCENDING), ('x', ASCENDING), ('y', ASCENDING)], name='level_cell'),
+]
+
+
+def cell(latitude, longitude, zoom):
+    """
+    Web Mercator tile containing a point
+
+    Args:
+        latitude (float): Latitude in degrees
+        longitude (float): Longitude in degrees
+        zoom (int): Tile zoom
+
+    Returns:
+        tuple: (x, y) tile coordinates
+    """
+    n = 2 ** zoom
+    latitude = max(-MAX_MERCATOR_LATITUDE, min(MAX_MERCATOR_LATITUDE, latitude))
+    x = int((longitude + 180) / 360 * n)
+    phi = math.radians(latitude)
+    y = int((1 - math.log(math.tan(phi) + 1 / math.cos(phi)) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def category_key(category):
+    """Category as a field name: MongoDB does not allow dots or a leading $ in keys."""
+    if not category or not isinstance(category, str):
+        return UNCLASSIFIED
+    return category.replace('.', '_').lstrip('$') or UNCLASSIFIED
+
+
+def _add(deltas, document, sign, max_zoom):
+    point = document.get('geometry')
+    if not point:
+        return
+    longitude, latitude = point['coordinates']
+    category = category_key(document.get('category'))
+    for level in range(max_zoom + 1):
+        x, y = cell(latitude, longitude, level + CELL_BITS)
+        delta = deltas[(level, x, y)]
+        delta['count'] += sign
+        delta['lat_sum'] += sign * latitude
+        delta['lng_sum'] += sign * longitude
+        delta[f'categories.{category}'] += sign
+
+
+def cluster_deltas(old_documents, new_documents, max_zoom=CLUSTER_MAX_ZOOM):
+    """
+    Changes to the cluster cells when events move from their old to their new state
+
+    Args:
+        old_documents: Stored states of the events before the write (absent for new events)
+        new_documents: States after the write
+        max_zoom (int): Finest precomputed zoom level
+
+    Returns:
+        dict: (level, x, y) -> {field: increment}, without cells that do not change
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for document in old_documents:
+        _add(deltas, document, -1, max_zoom)
+    for document in new_documents:
+        _add(deltas, document, 1, max_zoom)
+    # An event that kept its point and category cancels out
+    changed = {}
+    for key, delta in deltas.items():
+        delta = {field: value for field, value in delta.items() if abs(value) > 1e-9}
+        if delta:
+            changed[key] = delta
+    return changed
+
+
+def update_clusters(clusters, old_documents, new_documents, max_zoom=CLUSTER_MAX_ZOOM):
+    """
+    Apply the changes of a batch of writes to the cluster collection
+
+    Args:
+        clusters: Cluster collection
+        old_documents: Stored states of the written events before the write
+        new_documents: States after the write
+
+    Returns:
+        int: Number of cells touched
+    """
+    deltas = cluster_deltas(old_documents, new_documents, max_zoom)
+    requests = []
+    for (level, x, y), delta in deltas.items():
+        requests.append(UpdateOne({'_id': f"{level}/{x}/{y}"},
+                                  {'$inc': delta, '$setOnInsert': {'level': level, 'x': x, 'y': y}},
+                                  upsert=True))
+    if requests:
+        clusters.bulk_write(requests, ordered=False)
+    return len(requests)
+
+
+def rebuild_clusters(events, clusters, max_zoom=CLUSTER_MAX_ZOOM, batch_size=1000):
+    """
+    Recompute all cells from the stored events, e.g. after a change of CLUSTER_MAX_ZOOM
+
+    Args:
+        events: Events collection
+        clusters: Cluster collection, emptied first
+        max_zoom (int): Finest precomputed zoom level
+        batch_size (int): Events folded into the cells per write
+
+    Returns:
+        dict: Counts of events and cells
+    """
+    clusters.delete_many({})
+    clusters.create_indexes(CLUSTER_INDEXES)
+    summary = {'events': 0, 'cells': 0}
+    batch = []
+    for document in events.find({'geometry': {'$exists': True}}, {'geometry': 1, 'category': 1}):
+        batch.append(document)
+        if len(batch) >= batch_size:
+            update_clusters(clusters, [], batch, max_zoom)
+            summary['events'] += len(batch)
+            batch = []
+    if batch:
+        update_clusters(clusters, [], batch, max_zoom)
+        summary['events'] += len(batch)
+    summary['cells'] = clusters.count_documents({})
+    return summary
@@ -1,36 +1,360 @@
 """Database operations for the news parser"""
 
 import os
+import math
+import hashlib
+import argparse
+import threading
 import pandas as pd
 from datetime import datetime
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne, WriteConcern, IndexModel, ASCENDING, DESCENDING, GEOSPHERE, TEXT
+from pymongo.errors import BulkWriteError, OperationFailure
 
 # Import settings from __init__.py
-from src.utils import MONGO_URI, MONGO_DB, MONGO_COLLECTION
+from src.utils import (MONGO_URI, MONGO_DB, MONGO_COLLECTION, MONGO_WRITE_W, MONGO_WRITE_JOURNAL,
+                       MONGO_BULK_BATCH_SIZE, OUTPUT_FORMAT, PIPELINE_OUTPUT_DIR, CLUSTERS_ENABLED,
+                       CLUSTERS_COLLECTION, TILE_VERSIONS_ENABLED, TILE_VERSIONS_COLLECTION)
+from src.utils.seen_urls import url_fingerprint
+from src.utils.parquet_store import ParquetAppender
+from src.utils.clusters import CLUSTER_INDEXES, update_clusters, rebuild_clusters
+from src.utils.map_tiles import TILE_FIELDS, touched_tiles, event_tiles, bump_tile_versions
+
+# Indexes the ingest side provisions; the frontend's filters, geo windows and search rely on them.
+# Documents stored before fingerprints existed are left out of the unique constraint.
+INDEXES = [
+    IndexModel([('fingerprint', ASCENDING)], name='fingerprint_unique', unique=True,
+               partialFilterExpression={'fingerprint': {'$exists': True}}),
+    IndexModel([('geometry', GEOSPHERE)], name='geometry_2dsphere'),
+    IndexModel([('category', ASCENDING), ('date', DESCENDING)], name='category_date'),
+    IndexModel([('title', TEXT), ('content', TEXT)], name='text_search', default_language='russian',
+               weights={'title': 3, 'content': 1}),
+]
+
+_collection = None
+_clusters = None
+_tile_versions = None
+_collection_lock = threading.Lock()
+
+
+def get_collection():
+    """
+    Return the events collection through a process-wide client, provisioning its indexes on first use
+
+    Returns:
+        pymongo.collection.Collection: Collection with the configured write concern
+    """
+    global _collection
+    with _collection_lock:
+        if _collection is None:
+            client = MongoClient(MONGO_URI)
+            write_concern = WriteConcern(w=int(MONGO_WRITE_W) if MONGO_WRITE_W.isdigit() else MONGO_WRITE_W,
+                                         j=MONGO_WRITE_JOURNAL)
+            collection = client[MONGO_DB].get_collection(MONGO_COLLECTION, write_concern=write_concern)
+            ensure_indexes(collection)
+            _collection = collection
+    return _collection
+
+
+def get_clusters_collection():
+    """
+    Return the map cluster collection, next to the events collection and with the same write concern
+
+    Returns:
+        pymongo.collection.Collection: Cluster collection
+    """
+    global _clusters
+    events = get_collection()
+    with _collection_lock:
+        if _clusters is None:
+            clusters = events.database.get_collection(CLUSTERS_COLLECTION, write_concern=events.write_concern)
+            clusters.create_indexes(CLUSTER_INDEXES)
+            _clusters = clusters
+    return _clusters
+
+
+def get_tile_versions_collection():
+    """
+    Return the map tile version collection, next to the events collection
+
+    Returns:
+        pymongo.collection.Collection: Tile version collection
+    """
+    global _tile_versions
+    events = get_collection()
+    with _collection_lock:
+        if _tile_versions is None:
+            _tile_versions = events.database.get_collection(TILE_VERSIONS_COLLECTION,
+                                                            write_concern=events.write_concern)
+    return _tile_versions
+
+
+def ensure_indexes(collection):
+    """
+    Create the indexes in INDEXES if they are missing
+
+    Args:
+        collection: Events collection
+    """
+    for index in INDEXES:
+        try:
+            collection.create_indexes([index])
+        except OperationFailure as e:
+            print(f"Warning: could not create index {index.document['name']}: {e}")
+
+
+def geometry(latitude, longitude):
+    """
+    GeoJSON point for a pair of coordinates
+
+    Args:
+        latitude: Latitude in degrees
+        longitude: Longitude in degrees
+
+    Returns:
+        dict: GeoJSON Point, or None if the coordinates are missing or out of range
+    """
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if not (math.isfinite(latitude) and math.isfinite(longitude)):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return {'type': 'Point', 'coordinates': [longitude, latitude]}
+
+
+def article_fingerprint(article):
+    """
+    Key identifying an article across runs
+
+    Args:
+        article (dict): Article dictionary
+
+    Returns:
+        str: Fingerprint of the normalized URL, or of title and content for articles without one
+    """
+    if article.get('url'):
+        return url_fingerprint(article['url'])
+    text = f"{article.get('title', '')}\0{article.get('content', '')}"
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
 
 def save_to_mongodb(articles):
     """
-    Save articles to MongoDB
+    Upsert articles into MongoDB, keyed by their fingerprint
+
+    Re-running the pipeline updates the stored documents instead of inserting copies. Upserts are
+    sent unordered, so one failing document does not stop the others; only failed documents go to
+    the CSV fallback.
     
     Args:
         articles: List of article dictionaries
+
+    Returns:
+        dict: Counts of inserted, updated and failed documents, and 'failed_fingerprints' of the
+        documents that were not written (they went to the fallback file instead)
     """
+    # Later copies of an article within the batch win, as they would in sequential inserts
+    documents = {}
+    for article in articles:
+        document = {key: value for key, value in article.items() if key != '_id'}
+        document['fingerprint'] = article_fingerprint(article)
+        document['geometry'] = geometry(article.get('latitude'), article.get('longitude'))
+        documents[document['fingerprint']] = document
+    documents = list(documents.values())
+
+    summary = {'inserted': 0, 'updated': 0, 'failed': 0}
+    failed = []
+    now = datetime.now().isoformat()
+    # Documents of the batches before this position were sent to MongoDB
+    position = 0
     try:
-        client = MongoClient(MONGO_URI)
-        db = client[MONGO_DB]
-        collection = db[MONGO_COLLECTION]
-        
-        # Insert in batches
-        batch_size = 100
-        for i in range(0, len(articles), batch_size):
-            batch = articles[i:i+batch_size]
-            collection.insert_many(batch)
-            
-        print(f"Successfully inserted {len(articles)} articles into MongoDB")
+        collection = get_collection()
+        for position in range(0, len(documents), MONGO_BULK_BATCH_SIZE):
+            batch = documents[position:position+MONGO_BULK_BATCH_SIZE]
+            requests = [UpdateOne({'fingerprint': doc['fingerprint']}, _upsert_update(doc, now), upsert=True)
+                        for doc in batch]
+            # Stored map fields, so that clusters can move events between cells and changed tiles are known
+            map_index = CLUSTERS_ENABLED or TILE_VERSIONS_ENABLED
+            previous = _stored_map_fields(collection, batch) if map_index else {}
+            errors = set()
+            try:
+                result = collection.bulk_write(requests, ordered=False)
+                details = result.bulk_api_result
+            except BulkWriteError as e:
+                details = e.details
+                for error in details.get('writeErrors', []):
+                    doc = batch[error['index']]
+                    print(f"Error saving article {doc.get('url') or doc['fingerprint']}: {error.get('errmsg')}")
+                    failed.append(doc)
+                    errors.add(error['index'])
+            summary['inserted'] += details.get('nUpserted', 0)
+            summary['updated'] += details.get('nModified', 0)
+            if map_index:
+                _refresh_map_index(previous, [doc for i, doc in enumerate(batch) if i not in errors])
+        print(f"Saved {len(documents)} articles to MongoDB: {summary['inserted']} new, "
+              f"{summary['updated']} updated, {len(failed)} failed")
     except Exception as e:
         print(f"Error saving to MongoDB: {e}")
-        # Save to CSV as fallback
-        df = pd.DataFrame(articles)
-        filename = f"data/news_articles_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        df.to_csv(filename, index=False)
-        print(f"Saved to CSV file: {filename}")
\ No newline at end of file
+        failed = failed + documents[position:]
+
+    summary['failed'] = len(failed)
+    summary['failed_fingerprints'] = [doc['fingerprint'] for doc in failed]
+    if failed:
+        save_fallback(failed)
+    return summary
+
+
+def _stored_map_fields(collection, documents):
+    fingerprints = [doc['fingerprint'] for doc in documents]
+    projection = dict.fromkeys(('fingerprint',) + TILE_FIELDS, 1)
+    return {doc['fingerprint']: doc for doc in collection.find({'fingerprint': {'$in': fingerprints}}, projection)}
+
+
+def _refresh_map_index(previous, written):
+    """
+    Move written events between map cluster cells and bump the versions of the tiles they touched;
+    a failure here must not fail the save itself
+    """
+    try:
+        if CLUSTERS_ENABLED:
+            old = [previous[doc['fingerprint']] for doc in written if doc['fingerprint'] in previous]
+            update_clusters(get_clusters_collection(), old, written)
+        if TILE_VERSIONS_ENABLED:
+            bump_tile_versions(get_tile_versions_collection(), touched_tiles(previous, written))
+    except Exception as e:
+        print(f"Warning: could not update map clusters and tiles: {e}")
+
+
+def save_fallback(documents):
+    """Keep documents that could not be written to MongoDB in the configured output format."""
+    if OUTPUT_FORMAT == 'parquet':
+        columns = sorted({key for doc in documents for key in doc if key != 'geometry'})
+        dataset = ParquetAppender(os.path.join(PIPELINE_OUTPUT_DIR, "mongo_fallback"), columns)
+        dataset.append(documents)
+        print(f"Saved {len(documents)} articles to Parquet dataset: {dataset.path}")
+        return
+    # Save to CSV as fallback
+    df = pd.DataFrame(documents)
+    os.makedirs("data", exist_ok=True)
+    filename = f"data/news_articles_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    df.to_csv(filename, index=False)
+    print(f"Saved to CSV file: {filename}")
+
+
+def _upsert_update(document, now):
+    update = {'$set': dict(document), '$setOnInsert': {'first_seen_at': now}}
+    # The 2dsphere index rejects null geometries, so the field is removed instead
+    if update['$set']['geometry'] is None:
+        del update['$set']['geometry']
+        update['$unset'] = {'geometry': ''}
+    return update
+
+
+def load_category_labels(limit=None):
+    """
+    Titles and categories of stored articles that were classified by the LLM
+
+    Args:
+        limit (int): Maximal number of articles to read
+
+    Returns:
+        list: (title, category) pairs
+    """
+    collection = get_collection()
+    # Labels from the local classifier itself would only reinforce its own mistakes, and fallback
+    # categories were assigned without asking the LLM at all
+    query = {'title': {'$type': 'string'}, 'category': {'$type': 'string'},
+             'category_source': {'$nin': ['local', 'fallback']}}
+    cursor = collection.find(query, {'title': 1, 'category': 1, '_id': 0})
+    if limit:
+        cursor = cursor.limit(limit)
+    return [(doc['title'], doc['category']) for doc in cursor]
+
+
+def _write_fingerprints(collection, requests, summary):
+    """Send fingerprint updates; documents whose fingerprint is already taken are counted as duplicates."""
+    try:
+        summary['fingerprinted'] += collection.bulk_write(requests, ordered=False).modified_count
+    except BulkWriteError as e:
+        summary['fingerprinted'] += e.details.get('nModified', 0)
+        summary['duplicates'] += sum(1 for error in e.details.get('writeErrors', []) if error.get('code') == 11000)
+        if any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+            raise
+
+
+def backfill_fingerprints(collection, batch_size=MONGO_BULK_BATCH_SIZE):
+    """
+    Give documents stored before fingerprints existed the fingerprint save_to_mongodb upserts by,
+    so re-ingesting their articles updates them instead of inserting copies
+
+    Args:
+        collection: Events collection
+        batch_size (int): Documents updated per bulk write
+
+    Returns:
+        dict: Counts of fingerprinted documents and of legacy copies of an already stored article
+    """
+    summary = {'fingerprinted': 0, 'duplicates': 0}
+    requests = []
+    for doc in collection.find({'fingerprint': {'$exists': False}}, {'url': 1, 'title': 1, 'content': 1}):
+        requests.append(UpdateOne({'_id': doc['_id']}, {'$set': {'fingerprint': article_fingerprint(doc)}}))
+        if len(requests) >= batch_size:
+            _write_fingerprints(collection, requests, summary)
+            requests = []
+    if requests:
+        _write_fingerprints(collection, requests, summary)
+    return summary
+
+
+def migrate(batch_size=MONGO_BULK_BATCH_SIZE):
+    """
+    Bring documents stored by earlier versions up to date: provision indexes, backfill fingerprints,
+    GeoJSON geometries from the scalar latitude/longitude fields and rebuild the map clusters
+
+    Args:
+        batch_size (int): Documents updated per bulk write
+
+    Returns:
+        dict: Counts of fingerprinted and backfilled documents, of legacy duplicates, of documents with
+        unusable coordinates and of cluster cells
+    """
+    collection = get_collection()
+    summary = {'backfilled': 0, 'invalid': 0}
+    summary.update(backfill_fingerprints(collection, batch_size))
+    query = {'geometry': {'$exists': False}, 'latitude': {'$ne': None}, 'longitude': {'$ne': None}}
+    requests = []
+    tiles = set()
+    for doc in collection.find(query, {'latitude': 1, 'longitude': 1}):
+        point = geometry(doc['latitude'], doc['longitude'])
+        if point is None:
+            summary['invalid'] += 1
+            continue
+        requests.append(UpdateOne({'_id': doc['_id']}, {'$set': {'geometry': point}}))
+        if TILE_VERSIONS_ENABLED:
+            tiles |= event_tiles({'geometry': point})
+        if len(requests) >= batch_size:
+            summary['backfilled'] += collection.bulk_write(requests, ordered=False).modified_count
+            requests = []
+    if requests:
+        summary['backfilled'] += collection.bulk_write(requests, ordered=False).modified_count
+    if tiles:
+        # Backfilled events appear on tiles that may have been cached without them
+        bump_tile_versions(get_tile_versions_collection(), tiles)
+    if CLUSTERS_ENABLED:
+        # Backfilled events were never counted in the map clusters
+        summary['cluster_cells'] = rebuild_clusters(collection, get_clusters_collection())['cells']
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MongoDB maintenance for the events collection")
+    parser.add_argument('command', choices=['migrate', 'rebuild-clusters'],
+                        help="migrate: create indexes and backfill fingerprints and geometries; "
+                             "rebuild-clusters: recompute the map clusters from the stored events")
+    args = parser.parse_args()
+    if args.command == 'migrate':
+        print(migrate())
+    elif args.command == 'rebuild-clusters':
+        print(rebuild_clusters(get_collection(), get_clusters_collection()))
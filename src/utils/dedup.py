@@ -0,0 +1,153 @@
+"""Near-duplicate article detection across sources with MinHash and LSH banding"""
+
+import re
+import hashlib
+import numpy as np
+
+# Import settings from __init__.py
+from src.utils import DEDUP_THRESHOLD
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+# Fields filled by enrichment that duplicates inherit from their representative
+ENRICHMENT_FIELDS = ('location', 'latitude', 'longitude', 'category', 'category_source')
+
+_rng = np.random.default_rng(20240501)
+# Odd multipliers for multiply-shift hashing; uint64 arithmetic wraps around on purpose
+_A = _rng.integers(1, 2**63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+
+WORD_RE = re.compile(r'\w+')
+
+
+def shingles(text):
+    """
+    Word shingles of a normalized text
+
+    Args:
+        text (str): Article title and content
+
+    Returns:
+        set: Word n-grams (single words for very short texts)
+    """
+    words = WORD_RE.findall(text.lower().replace('ё', 'е'))
+    if len(words) < SHINGLE_SIZE:
+        return set(words)
+    return {' '.join(words[i:i+SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text):
+    """
+    MinHash signature of a text
+
+    Args:
+        text (str): Article title and content
+
+    Returns:
+        numpy.ndarray: NUM_PERM uint64 values, or None for texts without words
+    """
+    items = shingles(text)
+    if not items:
+        return None
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little') for s in items),
+        dtype=np.uint64, count=len(items))
+    with np.errstate(over='ignore'):
+        permuted = (_A[:, None] * hashes[None, :] + _B[:, None]) >> np.uint64(32)
+    return permuted.min(axis=1)
+
+
+def article_text(article):
+    """Text used to compare articles: title plus content."""
+    content = article.get('content') or ''
+    if content == "No content found":
+        content = ''
+    return f"{article.get('title', '')} {content}"
+
+
+class NearDuplicateIndex:
+    """
+    Incremental index that maps each new article to an earlier near-duplicate, if any.
+    Candidates come from LSH band collisions and are confirmed by estimated Jaccard similarity.
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self.signatures = []
+        self.payloads = []
+        self.buckets = [{} for _ in range(BANDS)]
+
+    def add(self, article, payload=None):
+        """
+        Add an article to the index
+
+        Args:
+            article (dict): Article dictionary
+            payload: Object remembered for this article if it is new (the article itself by default);
+                streaming callers pass something smaller so the index does not keep whole articles alive
+
+        Returns:
+            Payload of the earlier article this one duplicates, or None if it is new
+        """
+        signature = minhash(article_text(article))
+        if signature is None:
+            return None
+
+        band_keys = [signature[b * ROWS:(b + 1) * ROWS].tobytes() for b in range(BANDS)]
+        candidates = set()
+        for band, key in enumerate(band_keys):
+            candidates.update(self.buckets[band].get(key, ()))
+
+        best, best_score = None, self.threshold
+        for idx in candidates:
+            score = float(np.mean(self.signatures[idx] == signature))
+            if score >= best_score:
+                best, best_score = idx, score
+        if best is not None:
+            return self.payloads[best]
+
+        idx = len(self.payloads)
+        self.signatures.append(signature)
+        self.payloads.append(article if payload is None else payload)
+        for band, key in enumerate(band_keys):
+            self.buckets[band].setdefault(key, []).append(idx)
+        return None
+
+
+def group_near_duplicates(articles):
+    """
+    Group near-duplicate articles across all sources
+
+    Args:
+        articles: List of article dictionaries
+
+    Returns:
+        list: Groups as lists of articles; the first article of each group is its representative
+    """
+    index = NearDuplicateIndex()
+    groups = {}
+    for article in articles:
+        representative = index.add(article)
+        if representative is None:
+            groups[id(article)] = [article]
+        else:
+            groups[id(representative)].append(article)
+    return list(groups.values())
+
+
+def copy_enrichment(representative, duplicates):
+    """
+    Copy the enrichment results of a representative onto its duplicates
+
+    Args:
+        representative (dict): Enriched article
+        duplicates: Articles of the same group
+    """
+    for duplicate in duplicates:
+        for field in ENRICHMENT_FIELDS:
+            if field in representative:
+                duplicate[field] = representative[field]
+        duplicate['duplicate_of'] = representative.get('url')
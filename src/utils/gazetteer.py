@@ -0,0 +1,231 @@
+"""Offline geocoding of settlements, districts and regions from a GeoNames-style gazetteer"""
+
+import os
+import csv
+import sys
+import bisect
+import difflib
+import threading
+from collections import namedtuple
+
+# Import settings from __init__.py
+from src.utils import GAZETTEER_PATH, GAZETTEER_MIN_POPULATION, GAZETTEER_FUZZY_CUTOFF
+from src.utils.geocode_cache import normalize_address
+from src.utils.russian import stem
+
+Place = namedtuple('Place', 'geonameid name latitude longitude feature_code admin1 population')
+
+# Feature codes worth indexing; populated places below GAZETTEER_MIN_POPULATION are skipped unless
+# they are capitals or city districts
+ADMIN_CODES = {'ADM1', 'ADM2', 'ADM3'}
+ALWAYS_KEPT = {'PPLC', 'PPLA', 'PPLA2', 'PPLA3', 'PPLX'}
+
+# The most specific part of an address decides its coordinates
+SPECIFICITY = {'PPLX': 5, 'ADM3': 2, 'ADM2': 1, 'ADM1': 0}
+POPULATED_SPECIFICITY = 4
+
+# Settlement-type words that GeoNames names usually omit ("город Химки" -> "Химки")
+SETTLEMENT_WORDS = {'город', 'поселок', 'село', 'деревня', 'район', 'микрорайон', 'станица', 'пгт'}
+_SETTLEMENT_STEMS = {stem(word) for word in SETTLEMENT_WORDS}
+
+# Words that make an address too precise for the gazetteer; these go to Yandex
+STREET_WORDS = {
+    'улица', 'проспект', 'переулок', 'площадь', 'шоссе', 'набережная', 'бульвар', 'проезд', 'тупик',
+    'аллея', 'дом', 'корпус', 'строение', 'километр', 'метро', 'станция', 'торговый', 'мкад', 'трасса',
+}
+
+COUNTRY_NAMES = {'россия', 'российская федерация', 'рф'}
+
+# A name shared by several places is only resolved locally when one of them clearly dominates
+AMBIGUITY_RATIO = 10
+
+# Candidate keys considered by the fuzzy lookup
+FUZZY_PREFIX = 3
+FUZZY_MAX_CANDIDATES = 300
+
+
+def _has_cyrillic(text):
+    return any('а' <= ch <= 'я' or ch == 'ё' for ch in text.lower())
+
+
+def name_key(name):
+    """
+    Index key of a place name: normalized, abbreviation-expanded words reduced to their stems
+
+    Args:
+        name (str): Place name as written in the gazetteer or an article
+
+    Returns:
+        str: Key ("Московской обл." and "Московская область" share one)
+    """
+    return ' '.join(stem(token) for token in normalize_address(name).split())
+
+
+class Gazetteer:
+    """
+    In-memory index of place names. Exact lookups are a dict access; names that are misspelled or
+    inflected beyond what the stemmer handles are matched against keys sharing their first letters.
+    """
+
+    def __init__(self):
+        self.places = {}
+        self.names = {}
+        self.keys = []
+
+    def add(self, place, names):
+        """Index a place under each of its names."""
+        for name in names:
+            key = name_key(name)
+            if not key:
+                continue
+            entries = self.places.setdefault(key, [])
+            if all(entry.geonameid != place.geonameid for entry in entries):
+                entries.append(place)
+            if _has_cyrillic(name):
+                self.names.setdefault(key, name)
+
+    def finalize(self):
+        """Sort candidates by population and build the prefix index; call after the last add()."""
+        for entries in self.places.values():
+            entries.sort(key=lambda place: place.population, reverse=True)
+        self.keys = sorted(self.places)
+
+    def __len__(self):
+        return len(self.places)
+
+    def _fuzzy(self, key):
+        start = bisect.bisect_left(self.keys, key[:FUZZY_PREFIX])
+        best, best_score = None, GAZETTEER_FUZZY_CUTOFF
+        for candidate in self.keys[start:start + FUZZY_MAX_CANDIDATES]:
+            if not candidate.startswith(key[:FUZZY_PREFIX]):
+                break
+            score = difflib.SequenceMatcher(None, key, candidate).ratio()
+            if score > best_score:
+                best, best_score = candidate, score
+        return self.places[best] if best else []
+
+    def lookup(self, name):
+        """
+        Places matching a name
+
+        Args:
+            name (str): Place name, possibly inflected or prefixed with a settlement type
+
+        Returns:
+            list: Matching places, most populous first (empty if nothing matches)
+        """
+        key = name_key(name)
+        if not key:
+            return []
+        words = key.split()
+        short_key = ' '.join(word for word in words if word not in _SETTLEMENT_STEMS)
+        for candidate in (key, short_key):
+            if candidate in self.places:
+                return self.places[candidate]
+        return self._fuzzy(short_key or key)
+
+    def geocode(self, address):
+        """
+        Resolve a coarse address ("Химки", "Москва, район Хамовники", "Тверская область")
+
+        Args:
+            address (str): Address extracted from an article
+
+        Returns:
+            tuple: (latitude, longitude), or None if the address is too precise, unknown or ambiguous
+        """
+        normalized = normalize_address(address)
+        if not normalized or any(ch.isdigit() for ch in normalized) or STREET_WORDS & set(normalized.split()):
+            return None
+
+        parts = [part for part in address.split(',') if normalize_address(part) not in COUNTRY_NAMES]
+        resolved = []
+        for part in parts:
+            if not normalize_address(part):
+                continue
+            candidates = self.lookup(part)
+            if not candidates:
+                return None
+            resolved.append(candidates)
+        if not resolved:
+            return None
+
+        # Regions named in the address narrow down the settlements ("Октябрьский, Башкортостан")
+        regions = {c[0].admin1 for c in resolved if c[0].feature_code == 'ADM1'}
+        best = None
+        for candidates in resolved:
+            if regions:
+                candidates = [place for place in candidates if place.admin1 in regions] or candidates
+            if (len(candidates) > 1 and (candidates[0].latitude, candidates[0].longitude) !=
+                    (candidates[1].latitude, candidates[1].longitude)
+                    and candidates[0].population < AMBIGUITY_RATIO * max(candidates[1].population, 1)):
+                return None
+            place = candidates[0]
+            if best is None or _specificity(place) >= _specificity(best):
+                best = place
+        return best.latitude, best.longitude
+
+
+def _specificity(place):
+    return SPECIFICITY.get(place.feature_code, POPULATED_SPECIFICITY)
+
+
+def load_geonames(path, min_population=GAZETTEER_MIN_POPULATION):
+    """
+    Build a gazetteer from a GeoNames dump (e.g. RU.txt from download.geonames.org/export/dump/)
+
+    Only administrative divisions and populated places are kept; Cyrillic alternate names are
+    indexed next to the main name so Russian spellings resolve.
+
+    Args:
+        path (str): Tab-separated file in the GeoNames "geoname" table format
+        min_population (int): Smallest ordinary settlement to keep
+
+    Returns:
+        Gazetteer: Loaded index
+    """
+    gazetteer = Gazetteer()
+    csv.field_size_limit(sys.maxsize)
+    with open(path, encoding='utf-8', newline='') as f:
+        for row in csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+            if len(row) < 15:
+                continue
+            feature_class, feature_code = row[6], row[7]
+            population = int(row[14] or 0)
+            if feature_class == 'A':
+                if feature_code not in ADMIN_CODES:
+                    continue
+            elif feature_class == 'P':
+                if feature_code not in ALWAYS_KEPT and population < min_population:
+                    continue
+            else:
+                continue
+
+            place = Place(row[0], row[1], float(row[4]), float(row[5]), feature_code, row[10], population)
+            names = {row[1], row[2]}
+            names.update(name for name in row[3].split(',') if _has_cyrillic(name))
+            gazetteer.add(place, names)
+    gazetteer.finalize()
+    return gazetteer
+
+
+_gazetteer = None
+_gazetteer_loaded = False
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """
+    Return the process-wide gazetteer, loading GAZETTEER_PATH on first use
+
+    Returns:
+        Gazetteer: Shared index, or None when no gazetteer file is configured or present
+    """
+    global _gazetteer, _gazetteer_loaded
+    with _gazetteer_lock:
+        if not _gazetteer_loaded:
+            _gazetteer_loaded = True
+            if GAZETTEER_PATH and os.path.exists(GAZETTEER_PATH):
+                _gazetteer = load_geonames(GAZETTEER_PATH)
+                print(f"Loaded {len(_gazetteer)} place names from {GAZETTEER_PATH}")
+    return _gazetteer
@@ -0,0 +1,165 @@
+"""Persistent address -> coordinates cache with address normalization and negative caching"""
+
+import os
+import re
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Import settings from __init__.py
+from src.utils import (GEOCODE_CACHE_ENABLED, GEOCODE_CACHE_PATH, GEOCODE_CACHE_TTL_DAYS,
+                       GEOCODE_NEGATIVE_TTL_DAYS, GEOCODE_CACHE_MEMORY_ITEMS)
+
+# Sentinel distinguishing "not cached" from a cached negative result
+MISS = object()
+
+# Abbreviations that name the same thing, mapped to one canonical word
+ABBREVIATIONS = {
+    'ул': 'улица', 'пр': 'проспект', 'пр-т': 'проспект', 'просп': 'проспект', 'пр-кт': 'проспект',
+    'пер': 'переулок', 'пл': 'площадь', 'ш': 'шоссе', 'наб': 'набережная', 'б-р': 'бульвар',
+    'бул': 'бульвар', 'пр-д': 'проезд', 'мкр': 'микрорайон', 'мкрн': 'микрорайон', 'р-н': 'район',
+    'обл': 'область', 'г': 'город', 'гор': 'город', 'пос': 'поселок', 'п': 'поселок', 'д': 'дом',
+    'с': 'село', 'дер': 'деревня', 'км': 'километр', 'корп': 'корпус', 'к': 'корпус', 'стр': 'строение',
+    'ст': 'станция', 'м': 'метро', 'р': 'река', 'тц': 'торговый центр', 'трц': 'торговый центр',
+}
+
+TOKEN_RE = re.compile(r'[\w]+(?:-[\w]+)*')
+ORDINAL_RE = re.compile(r'^(\d+)-?(?:й|я|е|го|м|ой|ая|ий)$')
+
+
+def normalize_address(address):
+    """
+    Canonical form of an address for cache lookups
+
+    Lowercases, drops punctuation, expands common abbreviations ("ул." -> "улица", "км" -> "километр")
+    and strips ordinal endings ("32-й" -> "32"), so "МКАД, 32-й км" and "мкад 32 километр" share an entry.
+
+    Args:
+        address (str): Address as extracted from the article
+
+    Returns:
+        str: Normalized address
+    """
+    tokens = []
+    for token in TOKEN_RE.findall(address.lower().replace('ё', 'е')):
+        ordinal = ORDINAL_RE.match(token)
+        if ordinal:
+            token = ordinal.group(1)
+        tokens.append(ABBREVIATIONS.get(token, token))
+    return ' '.join(tokens)
+
+
+class GeocodeCache:
+    """SQLite store with a hot in-memory LRU tier, separate TTLs for found and not-found addresses"""
+
+    def __init__(self, path=GEOCODE_CACHE_PATH, ttl_days=GEOCODE_CACHE_TTL_DAYS,
+                 negative_ttl_days=GEOCODE_NEGATIVE_TTL_DAYS, memory_items=GEOCODE_CACHE_MEMORY_ITEMS):
+        self.ttl = ttl_days * 86400
+        self.negative_ttl = negative_ttl_days * 86400
+        self.memory_items = memory_items
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'negative_hits': 0, 'misses': 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocodes ("
+            "address TEXT PRIMARY KEY, latitude REAL, longitude REAL, created_at REAL)"
+        )
+        self.conn.commit()
+
+    def _expired(self, coords, created_at):
+        ttl = self.ttl if coords[0] is not None else self.negative_ttl
+        return time.time() - created_at > ttl
+
+    def _remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def get(self, address):
+        """
+        Look up an address
+
+        Args:
+            address (str): Address as extracted from the article
+
+        Returns:
+            tuple: (latitude, longitude), (None, None) for a cached negative result, or MISS
+        """
+        key = normalize_address(address)
+        with self.lock:
+            entry = self.memory.get(key)
+            tier = 'memory_hits'
+            if entry is None:
+                row = self.conn.execute(
+                    "SELECT latitude, longitude, created_at FROM geocodes WHERE address = ?", (key,)).fetchone()
+                if row is not None:
+                    entry = ((row[0], row[1]), row[2])
+                    tier = 'disk_hits'
+            if entry is None or self._expired(*entry):
+                self.memory.pop(key, None)
+                self.counters['misses'] += 1
+                return MISS
+
+            self._remember(key, entry)
+            coords = entry[0]
+            self.counters['negative_hits' if coords[0] is None else tier] += 1
+            return coords
+
+    def put(self, address, latitude, longitude):
+        """
+        Store a geocoding result; pass None coordinates to remember that the address was not found
+
+        Args:
+            address (str): Address as extracted from the article
+            latitude (float): Latitude or None
+            longitude (float): Longitude or None
+        """
+        key = normalize_address(address)
+        entry = ((latitude, longitude), time.time())
+        with self.lock:
+            self._remember(key, entry)
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?)",
+                                  (key, latitude, longitude, entry[1]))
+
+    def stats(self):
+        """
+        Hit-rate statistics since the cache was opened
+
+        Returns:
+            dict: Counters per tier and the overall hit rate
+        """
+        with self.lock:
+            stats = dict(self.counters)
+        lookups = sum(stats.values())
+        hits = lookups - stats['misses']
+        stats['hit_rate'] = round(hits / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_geocode_cache():
+    """
+    Return the process-wide geocode cache, or None when GEOCODE_CACHE_ENABLED is off
+
+    Returns:
+        GeocodeCache: Shared cache or None
+    """
+    global _cache
+    if not GEOCODE_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = GeocodeCache()
+    return _cache
@@ -1,14 +1,38 @@
 """Geocoding utilities for the news parser"""
 
 import requests
-from openai import OpenAI
 
 # Import settings from __init__.py
-from src.utils import OPENAI_API_KEY, YANDEX_API_KEY
+from src.utils import OPENAI_API_KEY, YANDEX_API_KEY, YANDEX_GEOCODER_URL, LLM_MODEL, HTTP_TIMEOUT
+from src.utils.geocode_cache import get_geocode_cache, MISS as GEOCODE_MISS
+from src.utils.gazetteer import get_gazetteer
+from src.utils.location_extractor import extract_location_locally
+from src.utils.llm_client import get_llm_client, LLMError
+from src.utils.llm_cache import get_llm_cache, prompt_version, MISS
 
-def extract_location_from_text(text):
+def location_messages(text):
+    """Chat messages asking the model for the location of an incident."""
+    prompt = f"""
+    Извлеки географическое место из новостного текста. Верни только адрес или место происшествия 
+    (например, "ул. Ленина, Москва", "ТЦ Мега, Химки", "МКАД, 32-й километр").
+    Если места нет в тексте, верни "Unknown".
+    
+    Текст: {text}  # Limiting text length
+    
+    Место: 
     """
-    Use OpenAI GPT to extract location information from news text
+    return [
+        {"role": "system", "content": "Ты - система извлечения мест из текста."},
+        {"role": "user", "content": prompt}
+    ]
+
+# Changes whenever the wording of the prompt changes, invalidating cached answers
+LOCATION_PROMPT_VERSION = prompt_version(location_messages("{text}"))
+
+async def extract_location_from_text_async(text):
+    """
+    Extract location information from news text with local rules, falling back to OpenAI GPT
+    when they find nothing or several candidates
     
     Args:
         text (str): News title and content
@@ -16,42 +40,61 @@ def extract_location_from_text(text):
     Returns:
         str: Location string or None if no location found
     """
+    location = extract_location_locally(text[:1000])
+    if location:
+        return location
+    
     if not OPENAI_API_KEY:
         print("Warning: OpenAI API key not set, skipping location extraction")
         return None
-        
-    client = OpenAI(api_key=OPENAI_API_KEY)
-    
-    prompt = f"""
-    Извлеки географическое место из новостного текста. Верни только адрес или место происшествия 
-    (например, "ул. Ленина, Москва", "ТЦ Мега, Химки", "МКАД, 32-й километр").
-    Если места нет в тексте, верни "Unknown".
-    
-    Текст: {text[:1000]}  # Limiting text length
     
-    Место: 
-    """
+    text = text[:1000]
+    cache = get_llm_cache()
+    if cache:
+        cached = cache.get('location', text, LOCATION_PROMPT_VERSION, LLM_MODEL)
+        if cached is not MISS:
+            return cached
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "Ты - система извлечения мест из текста."},
-                {"role": "user", "content": prompt}
-            ],
+        location = await get_llm_client().complete(
+            messages=location_messages(text),
             temperature=0.0,
             max_tokens=50
         )
-        location = response.choices[0].message.content.strip()
-        return None if location == "Unknown" else location
-    except Exception as e:
+        location = location.strip()
+        location = None if location == "Unknown" else location
+        if cache:
+            cache.put('location', text, LOCATION_PROMPT_VERSION, LLM_MODEL, location)
+        return location
+    except LLMError as e:
         print(f"Error extracting location: {e}")
         return None
 
 
+def extract_location_from_text(text):
+    """
+    Blocking version of extract_location_from_text_async
+    
+    Args:
+        text (str): News title and content
+        
+    Returns:
+        str: Location string or None if no location found
+    """
+    location = extract_location_locally(text[:1000])
+    if location:
+        return location
+    
+    if not OPENAI_API_KEY:
+        print("Warning: OpenAI API key not set, skipping location extraction")
+        return None
+    return get_llm_client().run(extract_location_from_text_async(text))
+
+
 def get_geocode(address):
     """
-    Geocode an address using Yandex Maps API
+    Geocode an address: coarse places (cities, districts, regions) are resolved from the local
+    gazetteer, repeated addresses from the geocode cache, everything else with the Yandex Maps API
     
     Args:
         address (str): Address to geocode
@@ -61,8 +104,44 @@ def get_geocode(address):
     """
     if not address:
         return None, None
+    
+    gazetteer = get_gazetteer()
+    if gazetteer:
+        coords = gazetteer.geocode(address)
+        if coords:
+            return coords
+    
+    cache = get_geocode_cache()
+    if cache:
+        cached = cache.get(address)
+        if cached is not GEOCODE_MISS:
+            return cached
+    
+    try:
+        latitude, longitude = geocode_with_yandex(address)
+    except Exception as e:
+        # Transient failures are not cached
+        print(f"Error geocoding address '{address}': {e}")
+        return None, None
+    
+    if cache:
+        cache.put(address, latitude, longitude)
+    return latitude, longitude
+
+
+def geocode_with_yandex(address):
+    """
+    Query the Yandex geocoder
+    
+    Args:
+        address (str): Address to geocode
+        
+    Returns:
+        tuple: (latitude, longitude) or (None, None) if the address was not found
         
-    base_url = "https://geocode-maps.yandex.ru/1.x/"
+    Raises:
+        requests.RequestException: If the request itself fails
+    """
     params = {
         'apikey': YANDEX_API_KEY,
         'geocode': address,
@@ -71,17 +150,13 @@ def get_geocode(address):
         'results': 1
     }
     
+    response = requests.get(YANDEX_GEOCODER_URL, params=params, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    result = response.json()
+    
     try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()
-        result = response.json()
-        
-        try:
-            pos = result['response']['GeoObjectCollection']['featureMember'][0]['GeoObject']['Point']['pos']
-            longitude, latitude = pos.split()
-            return float(latitude), float(longitude)
-        except (KeyError, IndexError):
-            return None, None
-    except Exception as e:
-        print(f"Error geocoding address '{address}': {e}")
-        return None, None
\ No newline at end of file
+        pos = result['response']['GeoObjectCollection']['featureMember'][0]['GeoObject']['Point']['pos']
+        longitude, latitude = pos.split()
+        return float(latitude), float(longitude)
+    except (KeyError, IndexError):
+        return None, None
@@ -0,0 +1,241 @@
+"""HTTP fetching utilities for the news parser"""
+
+import time
+import atexit
+import asyncio
+import random
+import threading
+import requests
+import aiohttp
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Import settings from __init__.py
+from src.utils import HTTP_TIMEOUT, HTTP_MAX_RETRIES, HTTP_CONCURRENCY_PER_SOURCE, HTTP_USER_AGENT
+from src.utils.page_cache import get_page_cache, is_replay
+from src.utils.rate_limiter import wait_for_slot, wait_for_slot_async
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Longest Retry-After a request waits for before giving up on the host's advice
+MAX_RETRY_AFTER = 120
+
+_session = None
+# Background event loop of this process and its aiohttp sessions, kept open across fetch_all calls
+_loop = None
+_async_sessions = {}
+_loop_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Return the process-wide requests session with keep-alive and retries
+
+    Returns:
+        requests.Session: Shared session
+    """
+    global _session
+    if _session is None:
+        retry = Retry(
+            total=HTTP_MAX_RETRIES,
+            backoff_factor=0.5,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=["GET", "HEAD"]
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=20, pool_maxsize=HTTP_CONCURRENCY_PER_SOURCE)
+        _session = requests.Session()
+        _session.headers['User-Agent'] = HTTP_USER_AGENT
+        _session.mount('http://', adapter)
+        _session.mount('https://', adapter)
+    return _session
+
+
+def fetch_text(url, timeout=None):
+    """
+    Fetch a single page through the shared session
+
+    Args:
+        url (str): Page URL
+        timeout (float): Request timeout in seconds
+
+    Returns:
+        str: Response body or None if the request fails
+    """
+    cache = get_page_cache()
+    if is_replay():
+        cached = cache.get(url)
+        return cached['body'] if cached else None
+
+    try:
+        headers = cache.conditional_headers(url) if cache else {}
+        wait_for_slot(url)
+        response = get_session().get(url, timeout=timeout or HTTP_TIMEOUT, headers=headers)
+        if response.status_code == 304:
+            cached = cache.get(url)
+            if cached:
+                return cached['body']
+            wait_for_slot(url)
+            response = get_session().get(url, timeout=timeout or HTTP_TIMEOUT)
+        response.raise_for_status()
+        if cache:
+            cache.put(url, response.text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return response.text
+    except Exception as e:
+        print(f"Error fetching {url}: {e}")
+        return None
+
+
+def retry_after(value):
+    """
+    Parse a Retry-After header
+
+    Args:
+        value (str): Seconds or an HTTP date
+
+    Returns:
+        float: Seconds to wait, at most MAX_RETRY_AFTER (0 if the value is missing or malformed)
+    """
+    if not value:
+        return 0.0
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return 0.0
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+async def _fetch_one(session, semaphore, url, retries, timeout, headers=None):
+    """
+    Fetch one URL with retries and jittered exponential backoff, or the server's Retry-After.
+    Returns (status, body, response headers); body is None for 304 and failures.
+    """
+    for attempt in range(retries + 1):
+        delay = 0.0
+        try:
+            # Politeness is per host and shared with other sources; waiting here does not hold a semaphore slot
+            await wait_for_slot_async(url)
+            async with semaphore:
+                async with session.get(url, headers=headers, timeout=timeout) as response:
+                    if response.status == 304:
+                        return 304, None, response.headers
+                    if response.status in RETRY_STATUSES and attempt < retries:
+                        delay = retry_after(response.headers.get('Retry-After'))
+                        raise aiohttp.ClientResponseError(
+                            response.request_info, response.history, status=response.status)
+                    response.raise_for_status()
+                    return response.status, await response.text(errors='replace'), response.headers
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt >= retries:
+                print(f"Error fetching {url}: {e}")
+                return None, None, {}
+            await asyncio.sleep(max(delay, 0.5 * 2 ** attempt + random.uniform(0, 0.5)))
+    return None, None, {}
+
+
+def _get_async_session():
+    """aiohttp session of the running event loop, created on first use and reused by later calls."""
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(limit=0, limit_per_host=HTTP_CONCURRENCY_PER_SOURCE, ttl_dns_cache=300)
+        session = aiohttp.ClientSession(connector=connector, headers={'User-Agent': HTTP_USER_AGENT})
+        _async_sessions[loop] = session
+    return session
+
+
+async def fetch_all_async(urls, concurrency=None, timeout=None, retries=None):
+    """
+    Fetch many URLs concurrently over pooled keep-alive connections
+
+    The session of the running loop stays open, so the connections are reused by the next call,
+    e.g. for the next listing page.
+
+    Args:
+        urls (list): Page URLs
+        concurrency (int): Maximum number of requests in flight; the per-host politeness rate still
+            decides how fast they are sent
+        timeout (float): Total timeout per request in seconds
+        retries (int): Retries per URL on network errors and 429/5xx
+
+    Returns:
+        dict: Mapping of URL to response body (None for failures)
+    """
+    unique_urls = list(dict.fromkeys(urls))
+    cache = get_page_cache()
+    if is_replay():
+        cached = {url: cache.get(url) for url in unique_urls}
+        return {url: entry['body'] if entry else None for url, entry in cached.items()}
+
+    retries = HTTP_MAX_RETRIES if retries is None else retries
+    semaphore = asyncio.Semaphore(concurrency or HTTP_CONCURRENCY_PER_SOURCE)
+    client_timeout = aiohttp.ClientTimeout(total=timeout or HTTP_TIMEOUT)
+    session = _get_async_session()
+
+    results = await asyncio.gather(*[
+        _fetch_one(session, semaphore, url, retries, client_timeout,
+                   cache.conditional_headers(url) if cache else None)
+        for url in unique_urls
+    ])
+    responses = dict(zip(unique_urls, results))
+    # Not modified, but the cached copy is gone: fetch the page again unconditionally
+    refetch = [url for url, (status, _, _) in responses.items() if status == 304 and not (cache and cache.get(url))]
+    if refetch:
+        results = await asyncio.gather(*[
+            _fetch_one(session, semaphore, url, retries, client_timeout) for url in refetch
+        ])
+        responses.update(zip(refetch, results))
+
+    pages = {}
+    for url, (status, body, headers) in responses.items():
+        if status == 304:
+            cached = cache.get(url)
+            body = cached['body'] if cached else None
+        elif body is not None and cache:
+            cache.put(url, body, headers.get('ETag'), headers.get('Last-Modified'))
+        pages[url] = body
+    return pages
+
+
+def _get_loop():
+    """Background event loop of this process, started on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="http-client", daemon=True).start()
+            atexit.register(_close_sessions)
+    return _loop
+
+
+def _close_sessions():
+    async def close():
+        for session in list(_async_sessions.values()):
+            await session.close()
+    try:
+        asyncio.run_coroutine_threadsafe(close(), _loop).result(timeout=5)
+    except Exception:
+        pass
+
+
+def fetch_all(urls, concurrency=None, timeout=None, retries=None):
+    """
+    Synchronous wrapper around fetch_all_async for use from parser code; all calls of a process
+    run on one background loop and share its connection pool
+
+    Args:
+        urls (list): Page URLs
+        concurrency (int): Maximum number of requests in flight; the per-host politeness rate still
+            decides how fast they are sent
+        timeout (float): Total timeout per request in seconds
+        retries (int): Retries per URL on network errors and 429/5xx
+
+    Returns:
+        dict: Mapping of URL to response body (None for failures)
+    """
+    if not urls:
+        return {}
+    future = asyncio.run_coroutine_threadsafe(fetch_all_async(urls, concurrency, timeout, retries), _get_loop())
+    return future.result()
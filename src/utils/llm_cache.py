@@ -0,0 +1,146 @@
+"""Persistent cache of LLM results keyed by normalized input, prompt version and model"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+
+# Import settings from __init__.py
+from src.utils import LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_MEMORY_ITEMS, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_MAX_AGE_DAYS
+
+# Sentinel distinguishing "not cached" from a cached None
+MISS = object()
+
+# Run size/age eviction once per this many writes
+EVICT_EVERY = 200
+
+
+def normalize_text(text):
+    """Unicode-normalize and collapse whitespace so formatting differences hit the same entry."""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def prompt_version(messages):
+    """
+    Short hash identifying a prompt template
+
+    Args:
+        messages (list): Chat messages rendered with a placeholder instead of the input text
+
+    Returns:
+        str: Version string; changes whenever the wording of the prompt changes
+    """
+    data = json.dumps(messages, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()[:12]
+
+
+def cache_key(task, text, version, model):
+    """Key of one cached result."""
+    data = '\0'.join((task, version, model, normalize_text(text)))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """SQLite store with an in-process LRU in front; safe to use from several threads"""
+
+    def __init__(self, path=LLM_CACHE_PATH, memory_items=LLM_CACHE_MEMORY_ITEMS,
+                 max_entries=LLM_CACHE_MAX_ENTRIES, max_age_days=LLM_CACHE_MAX_AGE_DAYS):
+        self.memory_items = memory_items
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.writes = 0
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, task TEXT, value TEXT, created_at REAL, accessed_at REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+        self.conn.commit()
+
+    def _remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def get(self, task, text, version, model):
+        """
+        Look up a cached result
+
+        Returns:
+            The cached value (which may be None), or MISS
+        """
+        key = cache_key(task, text, version, model)
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return self.memory[key]
+
+            row = self.conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return MISS
+            with self.conn:
+                self.conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            value = json.loads(row[0])
+            self._remember(key, value)
+            self.hits += 1
+            return value
+
+    def put(self, task, text, version, model, value):
+        """Store a result; value must be JSON-serializable."""
+        key = cache_key(task, text, version, model)
+        now = time.time()
+        with self.lock:
+            self._remember(key, value)
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?)",
+                                  (key, task, json.dumps(value, ensure_ascii=False), now, now))
+            self.writes += 1
+            if self.writes % EVICT_EVERY == 0:
+                self._evict(now)
+
+    def _evict(self, now):
+        """Drop entries older than max_age, then the least recently used beyond max_entries."""
+        with self.conn:
+            self.conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.max_age,))
+            self.conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """
+    Return the process-wide LLM cache, or None when LLM_CACHE_ENABLED is off
+
+    Returns:
+        LLMCache: Shared cache or None
+    """
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+    return _cache
@@ -0,0 +1,209 @@
+"""Shared asynchronous OpenAI client with concurrency limits, rate-limit budgeting and retries"""
+
+import re
+import time
+import random
+import asyncio
+import threading
+import openai
+from openai import AsyncOpenAI
+
+# Import settings from __init__.py
+from src.utils import OPENAI_API_KEY, OPENAI_BASE_URL, LLM_MODEL, LLM_CONCURRENCY, LLM_RPM, LLM_TPM, LLM_MAX_RETRIES
+
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError,
+                    openai.InternalServerError)
+
+DURATION_RE = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+class LLMError(Exception):
+    """Raised when a request still fails after all retries"""
+
+
+def parse_duration(value):
+    """
+    Parse OpenAI rate-limit reset values such as "20ms", "1s" or "6m0s"
+
+    Args:
+        value (str): Header value
+
+    Returns:
+        float: Seconds (0 if the value cannot be parsed)
+    """
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        return sum(float(n) * DURATION_UNITS[unit] for n, unit in DURATION_RE.findall(value))
+
+
+def estimate_tokens(messages, max_tokens):
+    """Rough token count of a request; Cyrillic averages about 3 characters per token."""
+    return sum(len(m['content']) for m in messages) // 3 + max_tokens
+
+
+class RateBudget:
+    """Requests- and tokens-per-minute buckets kept in sync with the API's rate-limit headers"""
+
+    def __init__(self, rpm=LLM_RPM, tpm=LLM_TPM):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = float(rpm)
+        self.tokens = float(tpm)
+        self.updated = time.monotonic()
+        self.pause_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.updated
+        self.updated = now
+        self.requests = min(self.rpm, self.requests + elapsed * self.rpm / 60)
+        self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / 60)
+
+    async def acquire(self, tokens):
+        """Wait until one request and the given number of tokens fit into the budget."""
+        tokens = min(tokens, self.tpm)
+        async with self.lock:
+            while True:
+                self._refill()
+                wait = self.pause_until - time.monotonic()
+                if wait <= 0 and self.requests >= 1 and self.tokens >= tokens:
+                    self.requests -= 1
+                    self.tokens -= tokens
+                    return
+                wait = max(wait,
+                           (1 - self.requests) * 60 / self.rpm,
+                           (tokens - self.tokens) * 60 / self.tpm,
+                           0.05)
+                await asyncio.sleep(wait)
+
+    def refund(self, tokens):
+        """Give back tokens that were reserved but not used."""
+        self.tokens = min(self.tpm, self.tokens + tokens)
+
+    def update_from_headers(self, headers):
+        """Align the local buckets with x-ratelimit-* headers of a response."""
+        remaining_requests = headers.get('x-ratelimit-remaining-requests')
+        remaining_tokens = headers.get('x-ratelimit-remaining-tokens')
+        if remaining_requests is not None:
+            self.requests = min(self.requests, float(remaining_requests))
+            if float(remaining_requests) < 1:
+                self.pause(parse_duration(headers.get('x-ratelimit-reset-requests')))
+        if remaining_tokens is not None:
+            self.tokens = min(self.tokens, float(remaining_tokens))
+            if float(remaining_tokens) < 1:
+                self.pause(parse_duration(headers.get('x-ratelimit-reset-tokens')))
+
+    def pause(self, seconds):
+        """Stop issuing requests for a while, e.g. after a 429."""
+        self.pause_until = max(self.pause_until, time.monotonic() + seconds)
+
+
+class LLMClient:
+    """
+    One AsyncOpenAI client per process running on a background event loop, so synchronous code
+    (pipeline threads, per-article helpers) and asynchronous code share the same connection pool,
+    concurrency limit and rate-limit budget.
+    """
+
+    def __init__(self, api_key=OPENAI_API_KEY, concurrency=LLM_CONCURRENCY, max_retries=LLM_MAX_RETRIES):
+        self.max_retries = max_retries
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="llm-client", daemon=True)
+        self.thread.start()
+        # Retries are handled here so that they respect the shared budget
+        self.client = AsyncOpenAI(api_key=api_key, base_url=OPENAI_BASE_URL, max_retries=0)
+        self.semaphore = None
+        self.budget = None
+        self.concurrency = concurrency
+        self.run(self._init_primitives())
+
+    async def _init_primitives(self):
+        # asyncio primitives must be created on the loop that uses them
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.budget = RateBudget()
+
+    def run(self, coro):
+        """
+        Run a coroutine on the client's event loop and wait for its result
+
+        Args:
+            coro: Coroutine to run
+
+        Returns:
+            The coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def complete(self, messages, max_tokens, model=LLM_MODEL, **kwargs):
+        """
+        Send a chat completion request within the concurrency limit and rate budget
+
+        Args:
+            messages (list): Chat messages
+            max_tokens (int): Completion token limit
+            model (str): Model name
+            **kwargs: Extra arguments for chat.completions.create
+
+        Returns:
+            str: Content of the first choice
+
+        Raises:
+            LLMError: If the request fails after all retries or the answer has no content
+        """
+        reserved = estimate_tokens(messages, max_tokens)
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            await self.budget.acquire(reserved)
+            try:
+                async with self.semaphore:
+                    raw = await self.client.chat.completions.with_raw_response.create(
+                        model=model, messages=messages, max_tokens=max_tokens, **kwargs)
+                self.budget.update_from_headers(raw.headers)
+                response = raw.parse()
+                if response.usage:
+                    self.budget.refund(max(0, reserved - response.usage.total_tokens))
+                content = response.choices[0].message.content if response.choices else None
+                if content is None:
+                    # Refusals and filtered completions come without text
+                    raise LLMError("response has no content")
+                return content
+            except RETRYABLE_ERRORS as e:
+                last_error = e
+                delay = 2 ** attempt + random.uniform(0, 1)
+                headers = getattr(getattr(e, 'response', None), 'headers', None) or {}
+                if headers:
+                    self.budget.update_from_headers(headers)
+                    delay = max(delay, parse_duration(headers.get('retry-after')))
+                if isinstance(e, openai.RateLimitError):
+                    self.budget.pause(delay)
+                await asyncio.sleep(delay)
+            except openai.APIError as e:
+                raise LLMError(str(e)) from e
+        raise LLMError(f"giving up after {self.max_retries + 1} attempts: {last_error}")
+
+    def complete_sync(self, messages, max_tokens, **kwargs):
+        """Blocking version of complete() for synchronous callers."""
+        return self.run(self.complete(messages, max_tokens, **kwargs))
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """
+    Return the shared LLM client of the current process, creating it on first use
+
+    Returns:
+        LLMClient: Shared client
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+    return _client
@@ -0,0 +1,253 @@
+"""Local category classifier: keyword rules plus a naive Bayes model trained on past LLM labels"""
+
+import os
+import json
+import math
+import random
+import threading
+from collections import Counter, defaultdict
+
+# Import settings from __init__.py
+from src.utils import LOCAL_CLASSIFIER_ENABLED, LOCAL_CLASSIFIER_MODEL_PATH, LOCAL_CLASSIFIER_THRESHOLD
+from src.utils.russian import stems
+
+OTHER = "Другое"
+
+# Word stems that signal a category; a title word matches if it starts with one of them.
+# Only words naming the incident itself: vehicles, drivers or "падение" occur in plenty of other news
+KEYWORD_RULES = {
+    "Пожар": ('пожар', 'возгоран', 'загорел', 'загоран', 'горел', 'сгорел', 'пламен', 'задымлен',
+              'тушен', 'потушил', 'огнеборц', 'подожг', 'подже'),
+    "ДТП": ('дтп', 'авари', 'столкнов', 'столкнул', 'наезд', 'сбил', 'сбит', 'перевернул', 'врезал',
+            'протаранил', 'въехал', 'вылетел', 'кювет'),
+    "Кража": ('краж', 'укра', 'похит', 'похищ', 'ограб', 'грабит', 'грабеж', 'разбой', 'воришк', 'угон',
+              'угнал', 'мошенн', 'обокрал'),
+    "Нарушение_порядка": ('драк', 'подрал', 'избил', 'избие', 'хулиган', 'дебош', 'потасовк', 'нападен',
+                          'напал', 'стрельб', 'поножовщин', 'вандал'),
+    "Несчастный_случай": ('несчастн', 'утонул', 'утоп', 'сорвал', 'обрушен', 'обрушил',
+                          'травм', 'отравлен', 'отравил', 'током', 'провалил', 'застрял', 'придавил',
+                          'взрыв'),
+}
+
+# Stems that name the incident unambiguously ("ДТП на трассе", "пожар в квартире"); one of them is
+# enough to classify a title without a model. Each must also be listed in KEYWORD_RULES
+DECISIVE_KEYWORDS = {
+    "Пожар": ('пожар', 'возгоран'),
+    "ДТП": ('дтп',),
+    "Кража": ('краж', 'ограб'),
+    "Нарушение_порядка": ('драк', 'поножовщин'),
+    "Несчастный_случай": ('несчастн', 'утонул'),
+}
+
+# Log-odds added per matching keyword: one keyword gives a confidence of about 0.6, two about 0.92
+RULE_WEIGHT = 2.0
+# Log-odds of a decisive keyword: about 0.87 on its own
+DECISIVE_WEIGHT = 3.5
+# Without a trained model, other keywords count only for categories matched by at least this many title words
+MIN_RULE_HITS = 2
+
+# Fewer labelled titles than this are not enough to fit a useful model
+MIN_TRAINING_SAMPLES = 200
+
+
+class NaiveBayesModel:
+    """Naive Bayes over the distinct stems of a title, stored as per-class log probabilities"""
+
+    def __init__(self, classes, priors, weights):
+        self.classes = classes
+        self.priors = priors
+        self.weights = weights
+
+    @classmethod
+    def fit(cls, samples, smoothing=1.0):
+        """
+        Fit the model
+
+        Args:
+            samples: List of (title, category) pairs
+            smoothing (float): Additive smoothing of word counts
+
+        Returns:
+            NaiveBayesModel: Fitted model
+        """
+        doc_counts = Counter()
+        word_counts = defaultdict(Counter)
+        for title, category in samples:
+            doc_counts[category] += 1
+            word_counts[category].update(set(stems(title)))
+
+        classes = sorted(doc_counts)
+        vocabulary = set()
+        for counts in word_counts.values():
+            vocabulary.update(counts)
+        totals = {c: sum(word_counts[c].values()) + smoothing * len(vocabulary) for c in classes}
+
+        priors = [math.log(doc_counts[c] / len(samples)) for c in classes]
+        weights = {word: [math.log((word_counts[c][word] + smoothing) / totals[c]) for c in classes]
+                   for word in vocabulary}
+        return cls(classes, priors, weights)
+
+    def log_scores(self, words):
+        """Unnormalized log posterior of each class; words outside the vocabulary are ignored."""
+        scores = list(self.priors)
+        for word in set(words):
+            row = self.weights.get(word)
+            if row is not None:
+                for i, value in enumerate(row):
+                    scores[i] += value
+        return dict(zip(self.classes, scores))
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'classes': self.classes, 'priors': self.priors, 'weights': self.weights}, f,
+                      ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['classes'], data['priors'], data['weights'])
+
+
+class LocalClassifier:
+    """
+    Combines keyword rules with an optional trained model. Both contribute log-odds per category;
+    the softmax of the sum is the confidence of the prediction. Rules alone never pick OTHER, so
+    without a model such titles always go to the LLM.
+    """
+
+    def __init__(self, model=None, categories=None):
+        self.model = model
+        if categories is None:
+            categories = [OTHER] + list(KEYWORD_RULES)
+            categories += [c for c in (model.classes if model else []) if c not in categories]
+        self.categories = categories
+
+    def rule_scores(self, words):
+        """Log-odds the keyword rules add to each category matched by the title words."""
+        hits, decisive = Counter(), Counter()
+        for category, keywords in KEYWORD_RULES.items():
+            for word in words:
+                if word.startswith(keywords):
+                    hits[category] += 1
+                    decisive[category] += word.startswith(DECISIVE_KEYWORDS.get(category, ()))
+        scores = {}
+        for category, count in hits.items():
+            # A single ordinary keyword only nudges the model; on its own it is too weak a signal
+            if self.model or decisive[category] or count >= MIN_RULE_HITS:
+                scores[category] = RULE_WEIGHT * count + (DECISIVE_WEIGHT - RULE_WEIGHT) * decisive[category]
+        return scores
+
+    def predict(self, text):
+        """
+        Classify a news title
+
+        Args:
+            text (str): News title
+
+        Returns:
+            tuple: (category, confidence between 0 and 1)
+        """
+        words = stems(text)
+        scores = dict.fromkeys(self.categories, 0.0)
+        if self.model:
+            model_scores = self.model.log_scores(words)
+            for category in self.categories:
+                scores[category] = model_scores.get(category, -math.inf)
+        for category, score in self.rule_scores(words).items():
+            scores[category] += score
+
+        best = max(self.categories, key=lambda c: scores[c])
+        total = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1.0 / total
+
+
+def classify_locally(text, threshold=LOCAL_CLASSIFIER_THRESHOLD):
+    """
+    Category of a title if the local classifier is confident about it
+
+    Args:
+        text (str): News title
+        threshold (float): Minimal confidence
+
+    Returns:
+        str: Category, or None when the title should go to the LLM
+    """
+    classifier = get_local_classifier()
+    if classifier is None:
+        return None
+    category, confidence = classifier.predict(text)
+    return category if confidence >= threshold else None
+
+
+def train(samples, path=LOCAL_CLASSIFIER_MODEL_PATH, threshold=LOCAL_CLASSIFIER_THRESHOLD, holdout=0.1, seed=0):
+    """
+    Fit the model on labelled titles, report held-out quality and save it
+
+    Args:
+        samples: List of (title, category) pairs
+        path (str): Where to save the model
+        threshold (float): Confidence threshold to evaluate
+        holdout (float): Share of samples used for evaluation
+        seed (int): Shuffle seed
+
+    Returns:
+        dict: Held-out accuracy, share of titles classified locally and accuracy on those
+    """
+    samples = list(samples)
+    if len(samples) < MIN_TRAINING_SAMPLES:
+        raise ValueError(f"need at least {MIN_TRAINING_SAMPLES} labelled titles, got {len(samples)}")
+    random.Random(seed).shuffle(samples)
+    split = max(1, int(len(samples) * holdout))
+    test, fit_samples = samples[:split], samples[split:]
+
+    classifier = LocalClassifier(NaiveBayesModel.fit(fit_samples))
+    correct = confident = confident_correct = 0
+    for title, category in test:
+        predicted, confidence = classifier.predict(title)
+        correct += predicted == category
+        if confidence >= threshold:
+            confident += 1
+            confident_correct += predicted == category
+
+    NaiveBayesModel.fit(samples).save(path)
+    return {
+        'samples': len(samples),
+        'accuracy': round(correct / len(test), 3),
+        'local_share': round(confident / len(test), 3),
+        'local_accuracy': round(confident_correct / confident, 3) if confident else None,
+    }
+
+
+_classifier = None
+_classifier_loaded = False
+_classifier_lock = threading.Lock()
+
+
+def get_local_classifier():
+    """
+    Return the process-wide local classifier, loading the trained model if one was saved
+
+    Returns:
+        LocalClassifier: Shared classifier, or None when LOCAL_CLASSIFIER_ENABLED is off
+    """
+    global _classifier, _classifier_loaded
+    if not LOCAL_CLASSIFIER_ENABLED:
+        return None
+    with _classifier_lock:
+        if not _classifier_loaded:
+            _classifier_loaded = True
+            model = None
+            if os.path.exists(LOCAL_CLASSIFIER_MODEL_PATH):
+                model = NaiveBayesModel.load(LOCAL_CLASSIFIER_MODEL_PATH)
+            _classifier = LocalClassifier(model)
+    return _classifier
+
+
+if __name__ == "__main__":
+    from src.utils.db_handler import load_category_labels
+
+    print(train(load_category_labels()))
@@ -0,0 +1,177 @@
+"""Rule- and gazetteer-based extraction of incident locations from Russian news text"""
+
+import re
+import threading
+
+# Import settings from __init__.py
+from src.utils import LOCAL_LOCATION_EXTRACTION
+from src.utils.gazetteer import get_gazetteer, ADMIN_CODES
+from src.utils.geocode_cache import ABBREVIATIONS
+from src.utils.russian import WORD_RE, stem
+
+# Street types written before the name: "ул. Ленина", "проспекте Мира"
+STREET_BEFORE = (r'(?i:ул\.|улиц[аеуыи]|пр-к?т[ае]?|просп\.|проспект[ае]?|пер\.|переул[ао]к[ае]?|б-р|'
+                 r'бульвар[ае]?|пл\.|площад[иь]|наб\.|набережн(?:ая|ой|ую)|пр-д|проезд[ае]?|ш\.|шоссе)')
+# Street types written after an adjective name: "Ленинском проспекте", "Варшавское шоссе"
+STREET_AFTER = (r'(?i:шоссе|проспект[ае]?|переул[ао]к[ае]?|бульвар[ае]?|проезд[ае]?|улиц[аеуыи]|'
+                r'набережн(?:ая|ой|ую)|площад[иь])')
+NAME = r'(?:\d+-?(?:го|й|я|е)?\s+)?[А-ЯЁ][а-яё]+(?:-[А-ЯЁа-яё]+)?(?:\s+[А-ЯЁ][а-яё]+){0,2}'
+HOUSE = r'(?:,?\s*(?:(?i:д\.|дом[ае]?)\s*)?\d+[а-я]?(?![\d.]))?'
+
+STREET_RE = re.compile(
+    rf'\b(?:{STREET_BEFORE}\s*{NAME}|[А-ЯЁ][а-яё]+(?:-[А-ЯЁа-яё]+)?\s+{STREET_AFTER}){HOUSE}')
+MKAD_RE = re.compile(
+    r'\b(?:(\d+)-?[а-я]{0,2}\s+(?i:км|километр[а-я]*)\s+МКАД|МКАД[,\s]+(?:(?i:на)\s+)?(\d+)-?[а-я]{0,2}\s+'
+    r'(?i:км|километр[а-я]*))')
+HIGHWAY_RE = re.compile(r'\b(?:(\d+)-?[а-я]{0,2}\s+(?i:км|километр[а-я]*)\s+)?(?i:трасс[аеыу])\s+«?([МРА])-?(\d+)')
+
+
+def _street(match):
+    return ' '.join(match.group(0).replace(',', ' ').split())
+
+
+class LocationExtractor:
+    """
+    Finds street addresses and highway kilometres with regular expressions and settlement names with a
+    trie of gazetteer keys, then builds a location only if the findings point to one place.
+    """
+
+    def __init__(self, gazetteer=None):
+        self.gazetteer = gazetteer
+        self.trie = {}
+        if gazetteer:
+            for key in gazetteer.places:
+                node = self.trie
+                for word in key.split():
+                    node = node.setdefault(word, {})
+                node[None] = key
+
+    def find_places(self, text, skip=()):
+        """
+        Gazetteer names mentioned in a text
+
+        Args:
+            text (str): News text
+            skip: (start, end) spans, e.g. street addresses, whose words are not place names
+
+        Returns:
+            list: (key, surface text) pairs in order of appearance
+        """
+        words = [m for m in WORD_RE.finditer(text.replace('ё', 'е').replace('Ё', 'Е'))
+                 if not any(start <= m.start() < end for start, end in skip)]
+        stems = [None] * len(words)
+
+        def stem_at(j):
+            # Only words that could continue a match are stemmed
+            if stems[j] is None:
+                word = words[j].group(0).lower()
+                stems[j] = stem(ABBREVIATIONS.get(word, word))
+            return stems[j]
+
+        found = []
+        i = 0
+        while i < len(words):
+            # Place names are capitalized; this keeps "мир" or "заря" in running text from matching
+            if not words[i].group(0)[0].isupper():
+                i += 1
+                continue
+            node, j, match = self.trie, i, None
+            while j < len(words) and stem_at(j) in node:
+                node = node[stems[j]]
+                j += 1
+                if None in node:
+                    match = (node[None], j)
+            if match:
+                key, end = match
+                found.append((key, text[words[i].start():words[end - 1].end()]))
+                i = end
+            else:
+                i += 1
+        return found
+
+    def extract(self, text):
+        """
+        Location of the incident described by a text
+
+        Args:
+            text (str): News title and the beginning of the article
+
+        Returns:
+            str: Address or place, or None if nothing was found or the text mentions several candidates
+        """
+        # Highway -> kilometre markers mentioned for it
+        highways = {}
+        for m in MKAD_RE.finditer(text):
+            highways.setdefault("МКАД", set()).add(m.group(1) or m.group(2))
+        for m in HIGHWAY_RE.finditer(text):
+            kilometres = highways.setdefault(f"трасса {m.group(2).upper()}-{m.group(3)}", set())
+            if m.group(1):
+                kilometres.add(m.group(1))
+        if len(highways) > 1 or any(len(kilometres) > 1 for kilometres in highways.values()):
+            return None
+
+        street_matches = list(STREET_RE.finditer(text))
+        streets = {_street(m) for m in street_matches}
+        if len(streets) > 1:
+            return None
+
+        settlements = []
+        if self.gazetteer:
+            skip = [m.span() for m in street_matches]
+            for key, surface in self.find_places(text, skip):
+                if self.gazetteer.places[key][0].feature_code in ADMIN_CODES:
+                    continue
+                name = self.gazetteer.names.get(key, surface)
+                if name not in settlements:
+                    settlements.append(name)
+        if len(settlements) > 1:
+            return None
+
+        if highways:
+            highway, kilometres = highways.popitem()
+            if kilometres:
+                return f"{highway}, {kilometres.pop()}-й километр"
+            # A highway without a kilometre runs for hundreds of kilometres; only a settlement pins it down
+            if settlements and not streets:
+                return f"{highway}, {settlements[0]}"
+            return None
+        # A street without a settlement exists in too many towns to be geocoded reliably
+        if streets and settlements:
+            return f"{streets.pop()}, {settlements[0]}"
+        if settlements and not streets:
+            return settlements[0]
+        return None
+
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def get_location_extractor():
+    """
+    Return the process-wide location extractor
+
+    Returns:
+        LocationExtractor: Shared extractor, or None when LOCAL_LOCATION_EXTRACTION is off
+    """
+    global _extractor
+    if not LOCAL_LOCATION_EXTRACTION:
+        return None
+    with _extractor_lock:
+        if _extractor is None:
+            _extractor = LocationExtractor(get_gazetteer())
+    return _extractor
+
+
+def extract_location_locally(text):
+    """
+    Location found by the local rules, or None when the text should go to the LLM
+
+    Args:
+        text (str): News title and the beginning of the article
+
+    Returns:
+        str: Location string or None
+    """
+    extractor = get_location_extractor()
+    return extractor.extract(text) if extractor else None
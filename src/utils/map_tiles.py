@@ -0,0 +1,69 @@
+"""Versions of map tiles, bumped on ingest for the tiles whose events changed so tile caches stay valid elsewhere"""
+
+from pymongo import UpdateOne
+
+# Import settings from __init__.py
+from src.utils import TILE_VERSION_MAX_ZOOM
+from src.utils.clusters import cell
+
+# Fields shown in tiles; changes to other fields (content, enrichment sources...) leave tiles as they are
+TILE_FIELDS = ('geometry', 'category', 'title', 'date', 'location')
+
+
+def event_tiles(document, max_zoom=TILE_VERSION_MAX_ZOOM):
+    """
+    Tiles showing an event, one per zoom level
+
+    Args:
+        document (dict): Event with a GeoJSON 'geometry'
+        max_zoom (int): Finest versioned zoom
+
+    Returns:
+        set: (zoom, x, y) tuples, empty for events without a point
+    """
+    point = document.get('geometry')
+    if not point:
+        return set()
+    longitude, latitude = point['coordinates']
+    return {(zoom, *cell(latitude, longitude, zoom)) for zoom in range(max_zoom + 1)}
+
+
+def touched_tiles(previous, written, max_zoom=TILE_VERSION_MAX_ZOOM):
+    """
+    Tiles whose content changes with a batch of writes
+
+    Args:
+        previous (dict): fingerprint -> stored state before the write, for events that existed
+        written: Written documents
+        max_zoom (int): Finest zoom with its own versions; deeper tiles use the version of their ancestor
+
+    Returns:
+        set: (zoom, x, y) tuples covering both the old and the new position of every changed event
+    """
+    tiles = set()
+    for document in written:
+        old = previous.get(document['fingerprint'])
+        if old is not None and all(old.get(field) == document.get(field) for field in TILE_FIELDS):
+            continue
+        tiles |= event_tiles(document, max_zoom)
+        if old is not None:
+            tiles |= event_tiles(old, max_zoom)
+    return tiles
+
+
+def bump_tile_versions(versions, tiles):
+    """
+    Increment the versions of tiles
+
+    Args:
+        versions: Tile version collection
+        tiles: (zoom, x, y) tuples
+
+    Returns:
+        int: Number of tiles bumped
+    """
+    requests = [UpdateOne({'_id': f"{zoom}/{x}/{y}"}, {'$inc': {'version': 1}}, upsert=True)
+                for zoom, x, y in tiles]
+    if requests:
+        versions.bulk_write(requests, ordered=False)
+    return len(requests)
@@ -0,0 +1,166 @@
+"""Content-addressed on-disk cache of fetched pages with conditional revalidation and offline replay"""
+
+import os
+import gzip
+import sqlite3
+import hashlib
+from datetime import datetime
+
+# Import settings from __init__.py
+from src.utils import PAGE_CACHE_MODE, PAGE_CACHE_DIR, PAGE_CACHE_MAX_MB
+
+# off: no caching; on: record every page and revalidate with ETag/Last-Modified;
+# replay: never touch the network, serve everything from the recorded archive
+CACHE_MODES = ('off', 'on', 'replay')
+
+
+class PageCache:
+    """
+    Page bodies are stored gzip-compressed under their SHA-256, so identical pages are kept once.
+    A SQLite index maps each URL to its body and validators and tracks access times for LRU eviction.
+    """
+
+    def __init__(self, directory=PAGE_CACHE_DIR, max_bytes=PAGE_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, 'blobs'), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, 'index.sqlite'), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, digest TEXT, etag TEXT, last_modified TEXT, stored_at TEXT, accessed_at TEXT)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, size INTEGER)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS pages_digest ON pages (digest)")
+        self.conn.commit()
+
+    def _blob_path(self, digest):
+        return os.path.join(self.directory, 'blobs', digest[:2], digest + '.gz')
+
+    def get(self, url):
+        """
+        Look up a cached page
+
+        Args:
+            url (str): Page URL
+
+        Returns:
+            dict: {'body', 'etag', 'last_modified'} or None if the URL is not cached
+        """
+        row = self.conn.execute(
+            "SELECT digest, etag, last_modified FROM pages WHERE url = ?", (url,)).fetchone()
+        if not row:
+            return None
+        try:
+            with gzip.open(self._blob_path(row[0]), 'rt', encoding='utf-8') as f:
+                body = f.read()
+        except OSError:
+            return None
+        with self.conn:
+            self.conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (datetime.now().isoformat(), url))
+        return {'body': body, 'etag': row[1], 'last_modified': row[2]}
+
+    def conditional_headers(self, url):
+        """
+        Build If-None-Match / If-Modified-Since headers for a cached URL
+
+        Args:
+            url (str): Page URL
+
+        Returns:
+            dict: Request headers (empty if the URL is not cached or has no validators)
+        """
+        row = self.conn.execute("SELECT etag, last_modified FROM pages WHERE url = ?", (url,)).fetchone()
+        headers = {}
+        if row and row[0]:
+            headers['If-None-Match'] = row[0]
+        if row and row[1]:
+            headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def put(self, url, body, etag=None, last_modified=None):
+        """
+        Store a page body and its validators
+
+        Args:
+            url (str): Page URL
+            body (str): Page HTML
+            etag (str): ETag response header
+            last_modified (str): Last-Modified response header
+        """
+        data = body.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with gzip.open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO blobs VALUES (?, ?)", (digest, os.path.getsize(path)))
+            self.conn.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                              (url, digest, etag, last_modified, now, now))
+        self.evict()
+
+    def total_size(self):
+        """Total size in bytes of the stored page bodies."""
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def _drop_blob(self, digest):
+        self.conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+        try:
+            os.remove(self._blob_path(digest))
+        except OSError:
+            pass
+
+    def evict(self):
+        """Drop least recently used pages until the cache fits into max_bytes."""
+        if self.total_size() <= self.max_bytes:
+            return
+
+        with self.conn:
+            # Bodies no page points to any more, e.g. after a page changed, go first
+            for (digest,) in self.conn.execute(
+                    "SELECT digest FROM blobs WHERE digest NOT IN (SELECT digest FROM pages)").fetchall():
+                self._drop_blob(digest)
+            excess = self.total_size() - self.max_bytes
+
+            for url, digest, size in self.conn.execute(
+                    "SELECT p.url, p.digest, b.size FROM pages p JOIN blobs b ON p.digest = b.digest "
+                    "ORDER BY p.accessed_at").fetchall():
+                if excess <= 0:
+                    break
+                self.conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+                # A body shared with other pages stays on disk, so dropping this page frees nothing yet
+                if self.conn.execute("SELECT 1 FROM pages WHERE digest = ? LIMIT 1", (digest,)).fetchone() is None:
+                    self._drop_blob(digest)
+                    excess -= size
+
+
+_cache = None
+
+
+def get_page_cache():
+    """
+    Return the page cache of the current process, or None when PAGE_CACHE_MODE is 'off'
+
+    Returns:
+        PageCache: Process-wide cache or None
+    """
+    global _cache
+    if PAGE_CACHE_MODE not in CACHE_MODES:
+        raise ValueError(f"PAGE_CACHE_MODE must be one of {CACHE_MODES}, got '{PAGE_CACHE_MODE}'")
+    if PAGE_CACHE_MODE == 'off':
+        return None
+    if _cache is None:
+        _cache = PageCache()
+    return _cache
+
+
+def is_replay():
+    """True when pages must be served from the recorded archive only."""
+    return PAGE_CACHE_MODE == 'replay'
@@ -0,0 +1,114 @@
+"""Parquet datasets of articles partitioned by publication day and source"""
+
+import os
+import uuid
+
+# Import settings from __init__.py
+from src.utils import PARQUET_COMPRESSION
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+PARTITION_COLUMNS = ['day', 'source_name']
+FLOAT_COLUMNS = ('latitude', 'longitude')
+UNKNOWN_DAY = 'unknown'
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet output needs pyarrow; install it or set OUTPUT_FORMAT=csv")
+
+
+def partition_day(date):
+    """
+    Partition value of an article date
+
+    Args:
+        date: ISO date string or datetime
+
+    Returns:
+        str: YYYY-MM-DD, or "unknown" for articles without a date
+    """
+    if not date:
+        return UNKNOWN_DAY
+    if not isinstance(date, str):
+        date = date.isoformat()
+    return date[:10]
+
+
+class ParquetAppender:
+    """
+    Appends rows to a hive-partitioned dataset (day=.../source_name=.../part-*.parquet). Every chunk
+    becomes new files, so earlier runs and chunks are never rewritten.
+    """
+
+    def __init__(self, path, columns, compression=PARQUET_COMPRESSION):
+        _require_pyarrow()
+        self.path = path
+        self.columns = columns
+        self.compression = compression
+        self.rows_written = 0
+        self.run_id = uuid.uuid4().hex[:12]
+        self.chunks = 0
+        fields = [pa.field(c, pa.float64() if c in FLOAT_COLUMNS else pa.string()) for c in columns]
+        if 'day' not in columns:
+            fields.append(pa.field('day', pa.string()))
+        self.schema = pa.schema(fields)
+        os.makedirs(path, exist_ok=True)
+
+    def _value(self, column, value):
+        if value is None:
+            return None
+        if column in FLOAT_COLUMNS:
+            return float(value)
+        return value if isinstance(value, str) else str(value)
+
+    def append(self, rows):
+        if not rows:
+            return
+        records = []
+        for row in rows:
+            record = {c: self._value(c, row.get(c)) for c in self.columns}
+            record['day'] = partition_day(row.get('date'))
+            record['source_name'] = record.get('source_name') or 'unknown'
+            records.append(record)
+        table = pa.Table.from_pylist(records, schema=self.schema)
+        pq.write_to_dataset(
+            table, self.path, partition_cols=PARTITION_COLUMNS, compression=self.compression,
+            basename_template=f"part-{self.run_id}-{self.chunks:05d}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore')
+        self.chunks += 1
+        self.rows_written += len(rows)
+
+
+def read_articles(path, columns=None, start_day=None, end_day=None, sources=None):
+    """
+    Read part of an article dataset; only the requested columns and matching partitions are loaded
+
+    Args:
+        path (str): Dataset directory
+        columns (list): Columns to read (all by default)
+        start_day (str): First day to include, YYYY-MM-DD; undated articles are left out with either bound
+        end_day (str): Last day to include, YYYY-MM-DD
+        sources (list): Source names to include
+
+    Returns:
+        pandas.DataFrame: Matching articles
+    """
+    _require_pyarrow()
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    condition = None
+    for part in (
+        # UNKNOWN_DAY sorts after every ISO date, so a start bound alone would let it through
+        ds.field('day') != UNKNOWN_DAY if start_day or end_day else None,
+        ds.field('day') >= start_day if start_day else None,
+        ds.field('day') <= end_day if end_day else None,
+        ds.field('source_name').isin(sources) if sources else None,
+    ):
+        if part is not None:
+            condition = part if condition is None else condition & part
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
@@ -0,0 +1,182 @@
+"""Per-host politeness scheduler shared by all parser worker processes"""
+
+import time
+import random
+import asyncio
+import threading
+from urllib.parse import urlsplit
+from multiprocessing.managers import BaseManager
+
+# Import settings from __init__.py
+from src.utils import POLITENESS_RATE, POLITENESS_BURST, POLITENESS_JITTER
+
+
+class TokenBucket:
+    """Reservation-based token bucket: callers book a slot and are told how long to wait for it"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self):
+        """
+        Take one token, letting the balance go negative when the bucket is empty
+
+        Returns:
+            float: Seconds the caller has to wait before using its slot
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class HostScheduler:
+    """Token bucket per host; reservations only delay requests to the same host"""
+
+    def __init__(self, default_rate=POLITENESS_RATE, default_burst=POLITENESS_BURST, jitter=POLITENESS_JITTER):
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.jitter = jitter
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def configure(self, host, rate=None, burst=None):
+        """
+        Set the request rate of a host, e.g. from a source's requests_per_second
+
+        Args:
+            host (str): Host name
+            rate (float): Requests per second
+            burst (int): Requests allowed back to back before throttling starts
+        """
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                self.buckets[host] = TokenBucket(rate or self.default_rate, burst or self.default_burst)
+            else:
+                # Keep the current balance so reconfiguring from another worker cannot reset throttling
+                bucket.rate = rate or self.default_rate
+                bucket.burst = burst or self.default_burst
+
+    def reserve(self, host):
+        """
+        Book the next request slot for a host
+
+        Args:
+            host (str): Host name
+
+        Returns:
+            float: Seconds to wait before sending the request
+        """
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.default_rate, self.default_burst)
+            delay = bucket.reserve()
+        if delay > 0 and self.jitter:
+            delay += random.uniform(0, self.jitter)
+        return delay
+
+
+class SchedulerManager(BaseManager):
+    """Manager process hosting the HostScheduler shared by all workers"""
+
+
+SchedulerManager.register('HostScheduler', HostScheduler)
+
+_scheduler = None
+
+
+def start_scheduler_manager():
+    """
+    Start the manager process holding the shared scheduler
+
+    Returns:
+        tuple: (started SchedulerManager, HostScheduler proxy to pass to install_scheduler)
+    """
+    manager = SchedulerManager()
+    manager.start()
+    return manager, manager.HostScheduler()
+
+
+def install_scheduler(scheduler):
+    """
+    Use a shared scheduler in this process (ProcessPoolExecutor initializer)
+
+    Args:
+        scheduler: HostScheduler or a proxy to one
+    """
+    global _scheduler
+    _scheduler = scheduler
+
+
+def get_scheduler():
+    """
+    Return the scheduler of this process, creating a local one if none was installed
+
+    Returns:
+        HostScheduler: Scheduler or proxy
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = HostScheduler()
+    return _scheduler
+
+
+def host_of(url):
+    """Host part of a URL, used as the politeness key."""
+    return urlsplit(url).netloc.lower()
+
+
+def configure_source(source_config):
+    """
+    Apply a source's requests_per_second and burst settings to its host
+
+    Args:
+        source_config (dict): Source entry from SOURCES_CONFIG
+    """
+    if 'requests_per_second' in source_config or 'burst' in source_config:
+        get_scheduler().configure(host_of(source_config['url']),
+                                  source_config.get('requests_per_second'), source_config.get('burst'))
+
+
+def wait_for_slot(url):
+    """
+    Block until a request to the URL's host is allowed
+
+    Args:
+        url (str): URL about to be requested
+
+    Returns:
+        float: Seconds waited
+    """
+    delay = get_scheduler().reserve(host_of(url))
+    if delay > 0:
+        time.sleep(delay)
+    return delay
+
+
+async def wait_for_slot_async(url):
+    """
+    Wait without blocking the event loop until a request to the URL's host is allowed
+
+    The reservation itself is a round trip to the shared scheduler process, so it runs on the
+    loop's default executor; manager proxies keep one connection per thread.
+
+    Args:
+        url (str): URL about to be requested
+
+    Returns:
+        float: Seconds waited
+    """
+    loop = asyncio.get_running_loop()
+    delay = await loop.run_in_executor(None, get_scheduler().reserve, host_of(url))
+    if delay > 0:
+        await asyncio.sleep(delay)
+    return delay
@@ -0,0 +1,46 @@
+"""Lightweight Russian text normalization shared by the local geocoder and classifiers"""
+
+import re
+
+WORD_RE = re.compile(r'\w+(?:-\w+)*')
+
+# Case and adjective endings, longest first so "ами" is stripped before "и"
+SUFFIXES = sorted((
+    'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ами', 'ями', 'ой', 'ей', 'ую', 'юю', 'ая', 'яя', 'ое', 'ее',
+    'ые', 'ие', 'ым', 'им', 'ом', 'ем', 'ых', 'их', 'ий', 'ый', 'ам', 'ям', 'ах', 'ях', 'ов', 'ев',
+    'а', 'я', 'у', 'ю', 'е', 'и', 'ы', 'о', 'ь',
+), key=len, reverse=True)
+
+# Stems shorter than this are left alone, otherwise short words collapse into each other
+MIN_STEM = 3
+
+
+def stem(word):
+    """
+    Strip the inflectional ending of a Russian word
+
+    Crude compared to a real morphological analyzer, but applied the same way to the index and to
+    the query it maps "Москва", "Москве" and "Москвой" to the same key.
+
+    Args:
+        word (str): Lowercase word
+
+    Returns:
+        str: Stem
+    """
+    # Hyphenated names inflect in the last part only ("Санкт-Петербурге")
+    head, sep, tail = word.rpartition('-')
+    for suffix in SUFFIXES:
+        if tail.endswith(suffix) and len(tail) - len(suffix) >= MIN_STEM:
+            return head + sep + tail[:-len(suffix)]
+    return word
+
+
+def tokens(text):
+    """Lowercase words of a text with "ё" folded into "е"."""
+    return WORD_RE.findall(text.lower().replace('ё', 'е'))
+
+
+def stems(text):
+    """Stems of the words of a text."""
+    return [stem(token) for token in tokens(text)]
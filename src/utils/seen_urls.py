@@ -0,0 +1,102 @@
+"""Persistent index of article URLs that were already ingested, for incremental crawling"""
+
+import os
+import sqlite3
+import hashlib
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Import settings from __init__.py
+from src.utils import SEEN_URLS_PATH
+
+# Query parameters that do not change the article a URL points to, matched by exact name;
+# parameters like from_date or region do select content and must stay
+TRACKING_PARAMS = {'yclid', 'gclid', 'fbclid', 'from', 'ref'}
+# Families of tracking parameters, matched by prefix
+TRACKING_PREFIXES = ('utm_',)
+
+
+def normalize_url(url):
+    """
+    Normalize an article URL so that trivial variants map to the same fingerprint
+
+    Args:
+        url (str): Article URL
+
+    Returns:
+        str: URL with lowercase scheme/host, no fragment, no tracking parameters and no trailing slash
+    """
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ''))
+
+
+def url_fingerprint(url):
+    """
+    Fingerprint of a normalized URL
+
+    Args:
+        url (str): Article URL
+
+    Returns:
+        str: Hex SHA-1 digest
+    """
+    return hashlib.sha1(normalize_url(url).encode('utf-8')).hexdigest()
+
+
+class SeenUrlIndex:
+    """SQLite-backed set of URL fingerprints, safe to share between worker processes"""
+
+    def __init__(self, path=SEEN_URLS_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_urls ("
+            "fingerprint TEXT PRIMARY KEY, url TEXT, source_name TEXT, seen_at TEXT)"
+        )
+        self.conn.commit()
+
+    def known(self, urls):
+        """
+        Return the subset of URLs that are already in the index
+
+        Args:
+            urls (list): Article URLs
+
+        Returns:
+            set: URLs whose fingerprint is known
+        """
+        fingerprints = {url: url_fingerprint(url) for url in urls}
+        unique = list(set(fingerprints.values()))
+        known = set()
+        # Stay well below SQLite's limit on bound parameters
+        for i in range(0, len(unique), 500):
+            chunk = unique[i:i+500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT fingerprint FROM seen_urls WHERE fingerprint IN ({placeholders})", chunk)
+            known.update(row[0] for row in rows)
+        return {url for url, fingerprint in fingerprints.items() if fingerprint in known}
+
+    def add(self, articles):
+        """
+        Add the URLs of ingested articles to the index
+
+        Args:
+            articles: List of article dictionaries with 'url' and 'source_name'
+        """
+        now = datetime.now().isoformat()
+        rows = [(url_fingerprint(a['url']), a['url'], a.get('source_name'), now)
+                for a in articles if a.get('url')]
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO seen_urls VALUES (?, ?, ?, ?)", rows)
+
+    def close(self):
+        """Close the underlying database connection."""
+        self.conn.close()
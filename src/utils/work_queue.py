@@ -0,0 +1,167 @@
+"""MongoDB-backed enrichment work queue with atomic claims, leases and acknowledgements"""
+
+import os
+import uuid
+import socket
+from datetime import datetime, timedelta, timezone
+from pymongo import MongoClient, UpdateOne, ReturnDocument, ASCENDING
+
+# Import settings from __init__.py
+from src.utils import (MONGO_URI, MONGO_DB, MONGO_QUEUE_COLLECTION, QUEUE_LEASE_SECONDS, QUEUE_MAX_ATTEMPTS,
+                       QUEUE_RETRY_SECONDS)
+from src.utils.dedup import ENRICHMENT_FIELDS
+
+# pending: waiting (or deferred until available_at); leased: claimed by a worker until available_at;
+# done: enriched and persisted, keeping only the enrichment; failed: gave up after QUEUE_MAX_ATTEMPTS claims
+STATUSES = ('pending', 'leased', 'done', 'failed')
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def default_worker_id():
+    """Worker name that is unique across hosts and processes."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _enrichment(article):
+    """Part of a finished article that its duplicates copy."""
+    return {field: article[field] for field in ('url',) + ENRICHMENT_FIELDS if field in article}
+
+
+class WorkQueue:
+    """
+    One document per article, keyed by its fingerprint. Claims are single atomic find-and-modify
+    operations, so any number of worker processes on any number of hosts can pull from the queue.
+    A claim is a lease: if the worker dies, the item becomes claimable again once the lease expires.
+    Acknowledgements carry the lease token, so a worker whose lease expired cannot complete an item
+    that another worker has claimed since.
+    """
+
+    def __init__(self, collection=None, lease_seconds=QUEUE_LEASE_SECONDS, max_attempts=QUEUE_MAX_ATTEMPTS,
+                 retry_seconds=QUEUE_RETRY_SECONDS):
+        if collection is None:
+            collection = MongoClient(MONGO_URI)[MONGO_DB][MONGO_QUEUE_COLLECTION]
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.collection.create_index([('status', ASCENDING), ('available_at', ASCENDING), ('seq', ASCENDING)],
+                                     name='claim_order')
+
+    def enqueue(self, items):
+        """
+        Add articles to the queue; articles already queued (in any status) are left as they are
+
+        Args:
+            items: List of (fingerprint, article, representative) tuples; representative is the
+                fingerprint of the article whose enrichment a near-duplicate reuses, or None
+
+        Returns:
+            int: Number of newly queued articles
+        """
+        if not items:
+            return 0
+        now = _now()
+        requests = [
+            UpdateOne({'_id': fingerprint}, {'$setOnInsert': {
+                'article': article, 'representative': representative, 'status': 'pending',
+                'available_at': now, 'attempts': 0, 'seq': now.timestamp() + i * 1e-6, 'created_at': now,
+            }}, upsert=True)
+            for i, (fingerprint, article, representative) in enumerate(items)
+        ]
+        return self.collection.bulk_write(requests, ordered=False).upserted_count
+
+    def claim(self, worker_id, limit):
+        """
+        Lease up to limit claimable items, oldest first
+
+        Args:
+            worker_id (str): Name of the claiming worker
+            limit (int): Maximal number of items
+
+        Returns:
+            list: Queue documents, each with the 'lease' token needed to ack it
+        """
+        now = _now()
+        # Leases that expired on their last allowed attempt will not be retried
+        self.collection.update_many(
+            {'status': 'leased', 'available_at': {'$lte': now}, 'attempts': {'$gte': self.max_attempts}},
+            {'$set': {'status': 'failed', 'error': 'lease expired on the last attempt', 'updated_at': now}})
+
+        claimed = []
+        for _ in range(limit):
+            lease = uuid.uuid4().hex
+            doc = self.collection.find_one_and_update(
+                {'status': {'$in': ['pending', 'leased']}, 'available_at': {'$lte': now},
+                 'attempts': {'$lt': self.max_attempts}},
+                {'$set': {'status': 'leased', 'lease': lease, 'worker': worker_id,
+                          'available_at': now + timedelta(seconds=self.lease_seconds), 'updated_at': now},
+                 '$inc': {'attempts': 1}},
+                sort=[('seq', ASCENDING)],
+                return_document=ReturnDocument.AFTER)
+            if doc is None:
+                break
+            claimed.append(doc)
+        return claimed
+
+    def _update_leased(self, items, update):
+        requests = [UpdateOne({'_id': item['_id'], 'status': 'leased', 'lease': item['lease']}, update(item))
+                    for item in items]
+        if not requests:
+            return 0
+        return self.collection.bulk_write(requests, ordered=False).modified_count
+
+    def ack(self, items):
+        """
+        Mark leased items as done. The article itself is in the events collection by now; only its
+        URL and enrichment are kept, for near-duplicates that are still queued
+
+        Returns:
+            int: Number of items acknowledged (items whose lease was lost are skipped)
+        """
+        now = _now()
+        return self._update_leased(items, lambda item: {
+            '$set': {'status': 'done', 'article': _enrichment(item['article']), 'updated_at': now},
+            '$unset': {'lease': '', 'error': ''}})
+
+    def defer(self, items, seconds=None):
+        """Put leased items back without counting the attempt, e.g. while their representative is in flight."""
+        available_at = _now() + timedelta(seconds=self.retry_seconds if seconds is None else seconds)
+        return self._update_leased(items, lambda item: {
+            '$set': {'status': 'pending', 'available_at': available_at}, '$inc': {'attempts': -1},
+            '$unset': {'lease': ''}})
+
+    def fail(self, items, error):
+        """Release leased items after an error; they are retried later until QUEUE_MAX_ATTEMPTS is reached."""
+        now = _now()
+        return self._update_leased(items, lambda item: {
+            '$set': {'status': 'failed' if item['attempts'] >= self.max_attempts else 'pending',
+                     'available_at': now + timedelta(seconds=self.retry_seconds), 'error': str(error),
+                     'updated_at': now},
+            '$unset': {'lease': ''}})
+
+    def lookup(self, fingerprints):
+        """
+        Current state of queued items
+
+        Args:
+            fingerprints: Item keys
+
+        Returns:
+            dict: fingerprint -> {'status': ..., 'article': ...} for the items that are queued
+        """
+        cursor = self.collection.find({'_id': {'$in': list(fingerprints)}}, {'status': 1, 'article': 1})
+        return {doc['_id']: doc for doc in cursor}
+
+    def counts(self):
+        """Number of items per status."""
+        counts = dict.fromkeys(STATUSES, 0)
+        for row in self.collection.aggregate([{'$group': {'_id': '$status', 'n': {'$sum': 1}}}]):
+            counts[row['_id']] = row['n']
+        return counts
+
+    def outstanding(self):
+        """Number of items that still have to be processed."""
+        return self.collection.count_documents({'status': {'$in': ['pending', 'leased']}})
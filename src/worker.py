@@ -0,0 +1,152 @@
+"""
+Enrichment worker: claims articles from the MongoDB work queue, enriches and persists them
+
+    python -m src.worker [--drain] [--batch-size N]
+
+Start as many workers as needed, on any hosts that reach MongoDB. A worker that dies leaves its
+claimed articles leased; they are picked up again by any worker once the lease expires.
+"""
+
+import os
+import time
+import argparse
+
+from src.utils.work_queue import WorkQueue, default_worker_id
+from src.utils.classification import process_articles_batch
+from src.utils.db_handler import save_to_mongodb
+from src.utils.dedup import copy_enrichment
+from src.utils.parquet_store import ParquetAppender
+from src.pipeline import PROCESSED_COLUMNS
+from src.utils import ENRICH_BATCH_SIZE, QUEUE_POLL_SECONDS, OUTPUT_FORMAT, PIPELINE_OUTPUT_DIR
+
+
+class EnrichmentWorker:
+    """Claim -> enrich -> persist -> ack loop over the work queue"""
+
+    def __init__(self, work_queue=None, batch_size=ENRICH_BATCH_SIZE, poll_seconds=QUEUE_POLL_SECONDS,
+                 worker_id=None):
+        self.queue = work_queue or WorkQueue()
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.worker_id = worker_id or default_worker_id()
+        self.stats = {'enriched': 0, 'duplicates': 0, 'deferred': 0, 'failed': 0}
+        self.processed_output = None
+        if OUTPUT_FORMAT == 'parquet':
+            # Every worker writes its own files, so concurrent workers can share the dataset
+            self.processed_output = ParquetAppender(os.path.join(PIPELINE_OUTPUT_DIR, "processed_articles"),
+                                                    PROCESSED_COLUMNS)
+
+    def split_duplicates(self, items):
+        """
+        Sort claimed items into articles to enrich, duplicates whose representative is finished and
+        duplicates that have to wait for it
+
+        Returns:
+            tuple: (to_enrich, resolved, waiting)
+        """
+        to_enrich, duplicates = [], []
+        for item in items:
+            (duplicates if item.get('representative') else to_enrich).append(item)
+        if not duplicates:
+            return to_enrich, [], []
+
+        claimed = {item['_id'] for item in to_enrich}
+        states = self.queue.lookup({item['representative'] for item in duplicates} - claimed)
+        resolved, waiting = [], []
+        for item in duplicates:
+            state = states.get(item['representative'])
+            if item['representative'] in claimed or (state and state['status'] in ('pending', 'leased')):
+                waiting.append(item)
+            elif state and state['status'] == 'done':
+                copy_enrichment(state['article'], [item['article']])
+                resolved.append(item)
+            else:
+                # The representative failed for good or was never queued: enrich the duplicate itself
+                to_enrich.append(item)
+        return to_enrich, resolved, waiting
+
+    def run_once(self):
+        """
+        Process one batch
+
+        Returns:
+            int: Number of claimed items
+        """
+        items = self.queue.claim(self.worker_id, self.batch_size)
+        if not items:
+            return 0
+        to_enrich, resolved, waiting = self.split_duplicates(items)
+
+        if to_enrich:
+            try:
+                process_articles_batch([item['article'] for item in to_enrich])
+            except Exception as e:
+                print(f"Error enriching batch, releasing it for a retry: {e}")
+                self.queue.fail(to_enrich, e)
+                self.stats['failed'] += len(to_enrich)
+                to_enrich = []
+
+        # Duplicates of articles enriched in this very batch need not wait
+        enriched = {item['_id']: item['article'] for item in to_enrich}
+        for item in [item for item in waiting if item['representative'] in enriched]:
+            copy_enrichment(enriched[item['representative']], [item['article']])
+            waiting.remove(item)
+            resolved.append(item)
+
+        finished = to_enrich + resolved
+        unsaved = []
+        if finished:
+            # Queue keys are the article fingerprints save_to_mongodb reports failures by
+            failed = set(save_to_mongodb([item['article'] for item in finished])['failed_fingerprints'])
+            unsaved = [item for item in finished if item['_id'] in failed]
+            saved = [item for item in finished if item['_id'] not in failed]
+            if self.processed_output:
+                self.processed_output.append([item['article'] for item in saved])
+            self.queue.ack(saved)
+            if unsaved:
+                # Released for a retry instead of being marked done
+                self.queue.fail(unsaved, "not saved to MongoDB")
+        if waiting:
+            self.queue.defer(waiting)
+
+        self.stats['enriched'] += len([item for item in to_enrich if item not in unsaved])
+        self.stats['duplicates'] += len([item for item in resolved if item not in unsaved])
+        self.stats['deferred'] += len(waiting)
+        self.stats['failed'] += len(unsaved)
+        return len(items)
+
+    def run(self, drain=False, producers_done=None):
+        """
+        Work until stopped, or with drain=True until nothing is left to process
+
+        Args:
+            drain (bool): Exit once the queue is empty
+            producers_done: Event; once it is set, exit as soon as the queue is empty
+
+        Returns:
+            dict: Counters of enriched, resolved duplicate, deferred and failed items
+        """
+        while True:
+            if self.run_once():
+                continue
+            draining = drain or (producers_done is not None and producers_done.is_set())
+            if draining and self.queue.outstanding() == 0:
+                break
+            time.sleep(self.poll_seconds)
+        return self.stats
+
+
+def run_worker(drain=False, batch_size=ENRICH_BATCH_SIZE, producers_done=None):
+    """Entry point for worker processes."""
+    worker = EnrichmentWorker(batch_size=batch_size)
+    stats = worker.run(drain=drain, producers_done=producers_done)
+    print(f"Worker {worker.worker_id} finished: {stats}")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enrich articles from the MongoDB work queue")
+    parser.add_argument('--drain', action='store_true', help="exit once the queue is empty")
+    parser.add_argument('--batch-size', type=int, default=ENRICH_BATCH_SIZE, help="articles claimed per batch")
+    args = parser.parse_args()
+    run_worker(drain=args.drain, batch_size=args.batch_size)
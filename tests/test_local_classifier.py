@@ -0,0 +1,31 @@
+"""Cold-start behaviour of the local classifier: keyword rules without a trained model"""
+
+import pytest
+
+from src.utils import LOCAL_CLASSIFIER_THRESHOLD
+from src.utils.local_classifier import LocalClassifier
+
+
+@pytest.mark.parametrize("title, category", [
+    ("ДТП на трассе", "ДТП"),
+    ("пожар в квартире", "Пожар"),
+    ("Возгорание на складе", "Пожар"),
+    ("Кража в магазине", "Кража"),
+    ("Драка у бара", "Нарушение_порядка"),
+    ("Утонул рыбак", "Несчастный_случай"),
+])
+def test_decisive_keyword_is_classified_locally(title, category):
+    predicted, confidence = LocalClassifier().predict(title)
+    assert predicted == category
+    assert confidence >= LOCAL_CLASSIFIER_THRESHOLD
+
+
+@pytest.mark.parametrize("title", [
+    "Полиция нашла угнанный автомобиль",
+    "Открытие автобусного маршрута в центре",
+    "Цены на бензин упали",
+    "Пожар после ДТП",
+])
+def test_weak_or_conflicting_keywords_go_to_the_llm(title):
+    _, confidence = LocalClassifier().predict(title)
+    assert confidence < LOCAL_CLASSIFIER_THRESHOLD